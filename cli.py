@@ -6,13 +6,129 @@ A single entry point for all Slack data export operations.
 Automatically routes to the appropriate specialized tool based on what you want to export.
 """
 
-import argparse
+import functools
 import sys
 import os
-import subprocess
-from datetime import datetime
+import time
+from types import MappingProxyType, SimpleNamespace
 from typing import Optional, List
 
+# Directory holding cli.py and the tool scripts it runs
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Accepted Slack token prefixes (User OAuth Tokens)
+TOKEN_PREFIXES = ('xoxp-',)
+
+OPERATIONS = ('later', 'dm', 'channel', 'search', 'list')
+
+# OAuth scopes each operation cannot work without; a token missing any of them
+# gets a warning when it is first entered (see the README for the full lists)
+REQUIRED_SCOPES = MappingProxyType({
+    'later': ('search:read',),
+    'dm': ('im:history',),
+    'channel': ('search:read',),
+    'search': ('search:read',),
+    'list': ('channels:read',)
+})
+
+# Main menu numbers: 1-5 pick from OPERATIONS by position, the next one exits
+MENU_CHOICES = tuple(str(number) for number in range(1, len(OPERATIONS) + 1))
+
+# Command-line options as (flags, add_argument keyword arguments). create_parser
+# registers them in this order, and fast_parse_args reads the tables derived below.
+ARG_SPECS = (
+    # Common arguments
+    (('-t', '--token'), {'help': 'Slack User OAuth Token (starts with xoxp-)'}),
+    (('-o', '--output'), {'help': 'Output file path'}),
+    (('-i', '--interactive'), {'action': 'store_true',
+                               'help': 'Force interactive mode even when operation is specified'}),
+    
+    # DM-specific arguments
+    (('-c', '--channel'), {'help': 'DM channel ID (for dm operation)'}),
+    (('-s', '--since'), {'help': 'Start date YYYY-MM-DD (for dm operation)'}),
+    (('--jsonl',), {'action': 'store_true',
+                    'help': 'Also write raw messages to <output>.jsonl (for dm operation)'}),
+    
+    # Search/Channel arguments
+    (('-q', '--query'), {'help': 'Search query or channel specification'}),
+    (('-m', '--max-results'), {'type': int, 'help': 'Maximum number of results'}),
+    (('--monthly-chunks',), {'action': 'store_true', 'help': 'Use monthly chunks for complete history'}),
+    
+    # Bookmarks arguments
+    (('--page-size',), {'type': int, 'help': 'Page size for bookmarks fetching'}),
+    (('--keep-raw',), {'action': 'store_true',
+                       'help': 'Keep the original API message in JSON bookmarks export'}),
+    
+    # Batch mode
+    (('--batch',), {'metavar': 'FILE',
+                    'help': 'Run the operations listed in a JSON file, one after another'}),
+)
+
+# Option tables for fast_parse_args. Options taking a value map to (dest, converter);
+# switches map to their dest. The dest is the long flag, as argparse derives it.
+VALUE_OPTIONS = MappingProxyType({
+    flag: (flags[-1].lstrip('-').replace('-', '_'), spec.get('type', str))
+    for flags, spec in ARG_SPECS if spec.get('action') != 'store_true'
+    for flag in flags
+})
+SWITCH_OPTIONS = MappingProxyType({
+    flag: flags[-1].lstrip('-').replace('-', '_')
+    for flags, spec in ARG_SPECS if spec.get('action') == 'store_true'
+    for flag in flags
+})
+
+# Menu, prompt and help blocks are emitted with a single print each
+MAIN_MENU = """
+🚀 Slack Export Tool
+==================================================
+What would you like to export?
+
+1. 📌 Saved Messages (Later)
+   Export all messages you've saved for later across all channels
+2. 💬 Direct Messages (DMs)
+   Export conversation history from a specific DM
+3. 📺 Channel Messages
+   Export all messages from a specific channel
+4. 🔍 Search Messages
+   Search and export messages using Slack's search syntax
+5. 📋 List Channels/DMs
+   Show all available channels and DMs with their IDs
+6. ❌ Exit
+"""
+
+TOKEN_HELP = """
+🔑 Slack Token Required
+You need a Slack User OAuth Token (starts with 'xoxp-')
+Get one at: https://api.slack.com/apps
+"""
+
+TIME_RANGE_MENU = """
+⏰ Time Range Options
+1. All time (use monthly chunks for complete history)
+2. Past week
+3. Past month
+4. This year (2025)
+5. Last year (2024)
+6. Custom date range
+7. No time filter (use current query as-is)
+"""
+
+SEARCH_QUERY_HELP = """
+🔍 Search Query
+Examples:
+  from:@john.smith                        - ALL messages from user using Slack handle
+  from:@john.smith after:2025-09-01       - User messages since Sept 1, 2025
+  from:U123456789                         - Alternative: use user ID
+  has:attachment                          - Messages with attachments
+  in:#channel project                     - Messages in channel containing 'project'
+"""
+
+
+def default_output_filename(operation: str, extension: str = 'md') -> str:
+    """Timestamped default output name, e.g. slack_later_20250101_120000.md."""
+    # time.strftime avoids importing datetime just to format the current time
+    return f"slack_{operation}_{time.strftime('%Y%m%d_%H%M%S')}.{extension}"
+
 
 class InteractivePrompts:
     """Handles all user input prompts."""
@@ -20,14 +136,11 @@ class InteractivePrompts:
     @staticmethod
     def get_token() -> str:
         """Get Slack token from user."""
-        print("\n🔑 Slack Token Required")
-        print("You need a Slack User OAuth Token (starts with 'xoxp-')")
-        print("Get one at: https://api.slack.com/apps")
-        print()
+        print(TOKEN_HELP)
         
         while True:
             token = input("Enter your Slack token: ").strip()
-            if token.startswith('xoxp-'):
+            if token.startswith(TOKEN_PREFIXES):
                 return token
             elif not token:
                 print("❌ Token cannot be empty")
@@ -37,8 +150,7 @@ class InteractivePrompts:
     @staticmethod
     def get_output_filename(operation: str, extension: str = 'md') -> str:
         """Get output filename from user."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        default_name = f"slack_{operation}_{timestamp}.{extension}"
+        default_name = default_output_filename(operation, extension)
         
         print(f"\n📁 Output File")
         filename = input(f"Output filename (default: {default_name}): ").strip()
@@ -48,8 +160,8 @@ class InteractivePrompts:
     @staticmethod
     def get_channel_id() -> str:
         """Get DM channel ID from user."""
-        print("\n💬 DM Channel Information")
-        print("You'll need the DM channel ID. Run 'list' operation first if you don't know it.")
+        print("\n💬 DM Channel Information\n"
+              "You'll need the DM channel ID. Run 'list' operation first if you don't know it.")
         
         while True:
             channel = input("Enter DM channel ID (e.g., D0889Q50GPM): ").strip()
@@ -67,8 +179,8 @@ class InteractivePrompts:
     @staticmethod
     def get_channel_query() -> str:
         """Get channel information and build query."""
-        print("\n📺 Channel Information")
-        print("Enter the channel name (e.g., #general) or ID")
+        print("\n📺 Channel Information\n"
+              "Enter the channel name (e.g., #general) or ID")
         
         while True:
             channel = input("Channel name/ID: ").strip()
@@ -76,24 +188,13 @@ class InteractivePrompts:
                 print("❌ Channel name/ID is required")
                 continue
             
-            if channel.startswith('#'):
-                return f"in:{channel}"
-            elif channel.startswith('C'):
-                return f"in:#{channel}"
-            else:
-                return f"in:#{channel}"
+            # Names and IDs both become "in:#<channel>"; only add the '#' if missing
+            return f"in:{channel}" if channel.startswith('#') else f"in:#{channel}"
     
     @staticmethod
     def get_search_query() -> str:
         """Get search query from user with examples."""
-        print("\n🔍 Search Query")
-        print("Examples:")
-        print("  from:@john.smith                        - ALL messages from user using Slack handle")
-        print("  from:@john.smith after:2025-09-01       - User messages since Sept 1, 2025")
-        print("  from:U123456789                         - Alternative: use user ID")
-        print("  has:attachment                          - Messages with attachments")
-        print("  in:#channel project                     - Messages in channel containing 'project'")
-        print()
+        print(SEARCH_QUERY_HELP)
         
         while True:
             query = input("Enter search query: ").strip()
@@ -104,15 +205,7 @@ class InteractivePrompts:
     @staticmethod
     def get_time_range_for_search() -> str:
         """Get time range preferences and modify query accordingly."""
-        print("\n⏰ Time Range Options")
-        print("1. All time (use monthly chunks for complete history)")
-        print("2. Past week")
-        print("3. Past month")
-        print("4. This year (2025)")
-        print("5. Last year (2024)")
-        print("6. Custom date range")
-        print("7. No time filter (use current query as-is)")
-        print()
+        print(TIME_RANGE_MENU)
         
         choice = input("Select time range (1-7, default: 7): ").strip()
         
@@ -134,8 +227,8 @@ class InteractivePrompts:
     @staticmethod
     def _get_custom_date_range() -> str:
         """Get custom start and end dates from user."""
-        print("\n📅 Custom Date Range")
-        print("Enter dates in YYYY-MM-DD format (leave blank to skip)")
+        print("\n📅 Custom Date Range\n"
+              "Enter dates in YYYY-MM-DD format (leave blank to skip)")
         
         start_date = input("Start date (e.g., 2024-06-01): ").strip()
         end_date = input("End date (e.g., 2024-12-31): ").strip()
@@ -166,6 +259,12 @@ class InteractivePrompts:
         response = input("\nUse monthly chunks for complete history? (y/N): ").strip().lower()
         return response == 'y'
 
+    @staticmethod
+    def chunk_on_limit() -> bool:
+        """Ask whether to switch to monthly chunks if the result limit is reached."""
+        response = input("\nIf the result limit is reached, switch to monthly chunks for complete history? (Y/n): ").strip().lower()
+        return response in ['', 'y', 'yes']
+
     @staticmethod
     def get_download_attachments() -> bool:
         """Ask if user wants to download attachments."""
@@ -189,73 +288,55 @@ class MenuDisplay:
     """Handles menu display and user choice selection."""
     
     @staticmethod
-    def show_main_menu() -> str:
-        """Display main menu and return selected operation."""
-        print("\n🚀 Slack Export Tool")
-        print("=" * 50)
-        print("What would you like to export?")
-        print()
-        print("1. 📌 Saved Messages (Later)")
-        print("   Export all messages you've saved for later across all channels")
-        print("2. 💬 Direct Messages (DMs)")
-        print("   Export conversation history from a specific DM")
-        print("3. 📺 Channel Messages")
-        print("   Export all messages from a specific channel")
-        print("4. 🔍 Search Messages")
-        print("   Search and export messages using Slack's search syntax")
-        print("5. 📋 List Channels/DMs")
-        print("   Show all available channels and DMs with their IDs")
-        print("6. ❌ Exit")
-        print()
+    def show_main_menu() -> Optional[str]:
+        """Display main menu and return selected operation, or None to exit."""
+        print(MAIN_MENU)
         
         return MenuDisplay._get_user_choice()
     
     @staticmethod
-    def _get_user_choice() -> str:
-        """Get and validate user menu choice."""
-        choice_map = {
-            '1': 'later',
-            '2': 'dm', 
-            '3': 'channel',
-            '4': 'search',
-            '5': 'list',
-            '6': 'exit'
-        }
-        
+    def _get_user_choice() -> Optional[str]:
+        """Get and validate user menu choice; None when the user exits or stdin runs out."""
         while True:
             try:
                 choice = input("Enter your choice (1-6): ").strip()
                 if choice == '6':
                     print("Goodbye! 👋")
-                    sys.exit(0)
-                elif choice in choice_map:
-                    return choice_map[choice]
+                    return None
+                elif choice in MENU_CHOICES:
+                    return OPERATIONS[int(choice) - 1]
                 else:
                     print("❌ Invalid choice. Please enter 1-6.")
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
                 print("\n\nGoodbye! 👋")
-                sys.exit(0)
+                return None
 
 
 class CommandBuilder:
-    """Builds command arguments for subprocess execution."""
+    """Builds command arguments for the export tools."""
+    
+    # Map operations to their corresponding tool modules (<name>.py in script_dir)
+    OPERATION_SCRIPTS = MappingProxyType({
+        'later': 'later',
+        'dm': 'history', 
+        'channel': 'search',
+        'search': 'search',
+        'list': 'list'
+    })
+    
+    __slots__ = ('script_dir', '_base_commands')
     
     def __init__(self, script_dir: str):
         self.script_dir = script_dir
-        
-        # Map operations to their corresponding scripts
-        self.operation_scripts = {
-            'later': 'later.py',
-            'dm': 'history.py', 
-            'channel': 'search.py',
-            'search': 'search.py',
-            'list': 'list.py'
+        # Resolve each operation's command prefix once, using the running interpreter
+        self._base_commands = {
+            operation: [sys.executable, os.path.join(script_dir, f'{module_name}.py')]
+            for operation, module_name in self.OPERATION_SCRIPTS.items()
         }
     
     def build_base_command(self, operation: str) -> List[str]:
-        """Build base command with script path."""
-        script_name = self.operation_scripts[operation]
-        return ['python3', os.path.join(self.script_dir, script_name)]
+        """Build base command with script path (a fresh list, since callers extend it)."""
+        return list(self._base_commands[operation])
     
     def add_common_params(self, cmd: List[str], token: str, output: str) -> None:
         """Add common token and output parameters."""
@@ -275,83 +356,157 @@ class CommandBuilder:
 class OperationHandler:
     """Handles execution of specific Slack export operations."""
     
+    # Direct-mode arguments forwarded to each tool, in order: (tool flag, args attribute, kind).
+    # 'required' and 'value' entries forward the value; 'flag' entries forward a bare switch.
+    DIRECT_ARGS = MappingProxyType({
+        'later': (('-t', 'token', 'required'), ('-o', 'output', 'value'),
+                  ('--page-size', 'page_size', 'value'), ('--keep-raw', 'keep_raw', 'flag')),
+        'dm': (('-t', 'token', 'required'), ('-c', 'channel', 'required'),
+               ('-o', 'output', 'value'), ('-s', 'since', 'value'), ('--jsonl', 'jsonl', 'flag')),
+        'channel': (('-t', 'token', 'required'), ('-q', 'query', 'required'), ('-o', 'output', 'value'),
+                    ('--monthly-chunks', 'monthly_chunks', 'flag'), ('-m', 'max_results', 'value')),
+        'search': (('-t', 'token', 'required'), ('-q', 'query', 'required'), ('-o', 'output', 'value'),
+                   ('-m', 'max_results', 'value'), ('--monthly-chunks', 'monthly_chunks', 'flag')),
+        'list': (('-t', 'token', 'required'),)
+    })
+    
+    # Arguments an operation cannot run without; any missing one means prompting instead
+    REQUIRED_ARGS = MappingProxyType({
+        operation: tuple(attr for _, attr, kind in spec if kind == 'required')
+        for operation, spec in DIRECT_ARGS.items()
+    })
+    
+    DIRECT_USAGE_ERRORS = MappingProxyType({
+        'later': "--token is required for bookmarks export",
+        'dm': "--token and --channel are required for DM export",
+        'channel': "--token and --query are required for channel export",
+        'search': "--token and --query are required for search",
+        'list': "--token is required for listing"
+    })
+    
     def __init__(self, script_dir: str):
         self.script_dir = script_dir
-        self.prompts = InteractivePrompts()
+        self.prompts = InteractivePrompts  # stateless: static methods, no instance needed
         self.cmd_builder = CommandBuilder(script_dir)
-    
-    def should_run_interactively(self, args, required_params: List[str]) -> bool:
+        # SLACK_CLI_SUBPROCESS=1 restores the old one-interpreter-per-operation behaviour
+        self.use_subprocess = os.environ.get('SLACK_CLI_SUBPROCESS') == '1'
+        # Token entered at the first prompt (and the scopes Slack granted it), reused for the rest of an interactive session
+        self.session_token = None
+        self.session_scopes = None
+        # Imported tool modules, keyed by script path
+        self._tools = {}
+    
+    def get_session_token(self, operation: str) -> str:
+        """
+        Prompt for the Slack token once per session and reuse it afterwards.
+
+        A new token is checked with auth.test before anything is fetched, so a
+        mistyped or revoked one is re-prompted instead of failing mid-export.
+        The token is only held in memory; it is never written to disk. Its
+        granted scopes are kept alongside it so every operation reusing it is
+        still warned about the scopes it lacks.
+        """
+        if self.session_token:
+            print("\n🔑 Using the Slack token entered earlier in this session")
+            self._warn_missing_scopes(operation, self.session_scopes)
+            return self.session_token
+        
+        from utils import check_token  # Deferred: utils pulls in requests, which --help never needs
+        while True:
+            token = self.prompts.get_token()
+            error, scopes = check_token(token)
+            if error:
+                print(f"❌ Slack rejected this token ({error})")
+                continue
+            
+            self._warn_missing_scopes(operation, scopes)
+            self.session_token = token
+            self.session_scopes = scopes
+            return token
+    
+    def _warn_missing_scopes(self, operation: str, scopes):
+        """Warn about scopes `operation` needs that the token was not granted (None: unknown)."""
+        if scopes is None:
+            return
+        missing = [scope for scope in REQUIRED_SCOPES[operation] if scope not in scopes]
+        if missing:
+            print(f"⚠️  This token is missing scopes the {operation} export needs: {', '.join(missing)}")
+    
+    def should_run_interactively(self, args, operation: str) -> bool:
         """Determine if operation should run in interactive mode."""
-        if args.interactive:
-            return True
+        return args.interactive or not all(getattr(args, attr, None) for attr in self.REQUIRED_ARGS[operation])
+    
+    def run_direct(self, operation: str, cmd: List[str], args) -> int:
+        """Run an operation without prompting, forwarding its arguments from `args` (command line or batch entry)."""
+        spec = self.DIRECT_ARGS[operation]
+        if not all(getattr(args, attr, None) for attr in self.REQUIRED_ARGS[operation]):
+            print(f"❌ Error: {self.DIRECT_USAGE_ERRORS[operation]}")
+            return 1
         
-        return any(not getattr(args, param, None) for param in required_params)
+        for flag, attr, kind in spec:
+            value = getattr(args, attr, None)
+            if not value:
+                continue
+            if kind == 'flag':
+                cmd.append(flag)
+            else:
+                cmd.extend([flag, str(value)])
+        
+        return self.execute_command(cmd)
     
     def execute_command(self, cmd: List[str]) -> int:
         """Execute command and return exit code."""
-        print(f"\n🚀 Running: {' '.join(cmd[2:])}")
-        return subprocess.run(cmd).returncode
-    
-    def execute_with_limit_check(self, cmd: List[str], token: str, query: str, output: str) -> int:
-        """Execute command and offer to re-run with monthly chunks if limit hit."""
-        # Run the command
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        # Print the output as it happens
-        print(result.stdout, end='')
-        if result.stderr:
-            print(result.stderr, end='', file=sys.stderr)
-        
-        # Check if we hit the limit (look for the warning in output)
-        if "⚠️  WARNING: Result limit reached!" in result.stdout:
-            print()  # Add spacing
-            response = input("Would you like to re-export with monthly chunks for complete history? (Y/n): ").strip().lower()
-            
-            if response in ['', 'y', 'yes']:
-                # Extract date range from original query
-                import re
-                after_match = re.search(r'after:(\d{4}-\d{2}-\d{2})', query)
-                before_match = re.search(r'before:(\d{4}-\d{2}-\d{2})', query)
-                
-                # Extract base query (channel specification)
-                base_query = query.split(' after:')[0].split(' before:')[0].strip()
-                
-                # Build new command with monthly chunks
-                new_cmd = self.cmd_builder.build_base_command('channel')
-                new_cmd.extend(['-t', token, '-q', base_query, '-o', output, '--monthly-chunks'])
-                
-                # Add date range if it was specified
-                if after_match:
-                    new_cmd.extend(['--start-date', after_match.group(1)])
-                if before_match:
-                    new_cmd.extend(['--end-date', before_match.group(1)])
-                
-                print("\n✨ Re-running with monthly chunks for complete history")
-                if after_match or before_match:
-                    date_range = []
-                    if after_match:
-                        date_range.append(f"from {after_match.group(1)}")
-                    if before_match:
-                        date_range.append(f"to {before_match.group(1)}")
-                    print(f"   Within your specified range: {' '.join(date_range)}")
-                print("   This may take longer but ensures all messages are retrieved\n")
-                
-                return subprocess.run(new_cmd).returncode
-        
-        return result.returncode
+        print("\n🚀 Running:", *cmd[2:])
+        return self.run_tool(cmd)
+    
+    def run_tool(self, cmd: List[str]) -> int:
+        """
+        Run a built command, in-process by default.
+
+        The tool module is imported once and its main() is called with the
+        command's arguments, avoiding a fresh interpreter per operation.
+        """
+        if self.use_subprocess:
+            import subprocess
+            # close_fds=False lets CPython launch via posix_spawn instead of fork+exec
+            # (our descriptors are non-inheritable by default, so nothing leaks); the
+            # child inherits our stdio directly, so nothing is piped or captured
+            with subprocess.Popen(cmd, close_fds=False) as proc:
+                return proc.wait()
+        
+        module = self._load_tool(cmd[1])
+        try:
+            return module.main(cmd[2:])
+        except SystemExit as e:
+            # argparse exits on bad arguments or --help; report it as the tool's exit code
+            if e.code is None or isinstance(e.code, int):
+                return e.code or 0
+            print(e.code, file=sys.stderr)
+            return 1
+    
+    def _load_tool(self, script_path: str):
+        """Import the tool module for a script path, once per handler."""
+        module = self._tools.get(script_path)
+        if module is None:
+            if self.script_dir not in sys.path:
+                sys.path.insert(0, self.script_dir)
+            import importlib
+            module_name = os.path.splitext(os.path.basename(script_path))[0]
+            module = self._tools[script_path] = importlib.import_module(module_name)
+        return module
     
     def run_later_export(self, args) -> int:
         """Run saved messages (bookmarks) export."""
         cmd = self.cmd_builder.build_base_command('later')
         
-        if self.should_run_interactively(args, ['token']):
+        if self.should_run_interactively(args, 'later'):
             return self._run_later_interactive(cmd)
         else:
-            return self._run_later_direct(cmd, args)
+            return self.run_direct('later', cmd, args)
     
     def _run_later_interactive(self, cmd: List[str]) -> int:
         """Run bookmarks export interactively."""
-        token = self.prompts.get_token()
+        token = self.get_session_token('later')
         output = self.prompts.get_output_filename('bookmarks')
 
         self.cmd_builder.add_common_params(cmd, token, output)
@@ -366,32 +521,18 @@ class OperationHandler:
 
         return self.execute_command(cmd)
     
-    def _run_later_direct(self, cmd: List[str], args) -> int:
-        """Run bookmarks export with direct arguments."""
-        if not args.token:
-            print("❌ Error: --token is required for bookmarks export")
-            return 1
-        
-        cmd.extend(['-t', args.token])
-        self.cmd_builder.add_optional_param(cmd, '-o', args.output)
-        
-        if args.page_size:
-            cmd.extend(['--page-size', str(args.page_size)])
-        
-        return self.execute_command(cmd)
-    
     def run_dm_export(self, args) -> int:
         """Run DM export."""
         cmd = self.cmd_builder.build_base_command('dm')
         
-        if self.should_run_interactively(args, ['token', 'channel']):
+        if self.should_run_interactively(args, 'dm'):
             return self._run_dm_interactive(cmd)
         else:
-            return self._run_dm_direct(cmd, args)
+            return self.run_direct('dm', cmd, args)
     
     def _run_dm_interactive(self, cmd: List[str]) -> int:
         """Run DM export interactively."""
-        token = self.prompts.get_token()
+        token = self.get_session_token('dm')
         channel = self.prompts.get_channel_id()
         output = self.prompts.get_output_filename('dm')
         since = self.prompts.get_date_range()
@@ -405,30 +546,18 @@ class OperationHandler:
 
         return self.execute_command(cmd)
     
-    def _run_dm_direct(self, cmd: List[str], args) -> int:
-        """Run DM export with direct arguments."""
-        if not args.token or not args.channel:
-            print("❌ Error: --token and --channel are required for DM export")
-            return 1
-        
-        cmd.extend(['-t', args.token, '-c', args.channel])
-        self.cmd_builder.add_optional_param(cmd, '-o', args.output)
-        self.cmd_builder.add_optional_param(cmd, '-s', args.since)
-        
-        return self.execute_command(cmd)
-    
     def run_channel_export(self, args) -> int:
         """Run channel export."""
         cmd = self.cmd_builder.build_base_command('channel')
         
-        if self.should_run_interactively(args, ['token', 'query']):
+        if self.should_run_interactively(args, 'channel'):
             return self._run_channel_interactive(cmd)
         else:
-            return self._run_channel_direct(cmd, args)
+            return self.run_direct('channel', cmd, args)
     
     def _run_channel_interactive(self, cmd: List[str]) -> int:
         """Run channel export interactively."""
-        token = self.prompts.get_token()
+        token = self.get_session_token('channel')
         base_query = self.prompts.get_channel_query()
         
         # Get time range preferences
@@ -454,45 +583,30 @@ class OperationHandler:
         self.cmd_builder.add_common_params(cmd, token, output)
         cmd.extend(['-q', query])
         self.cmd_builder.add_flag_if_true(cmd, '--monthly-chunks', use_chunks)
+        
+        # Decided up front, so search.py can switch to monthly chunks within the same run
+        if not use_chunks:
+            self.cmd_builder.add_flag_if_true(cmd, '--auto-chunk-on-limit', self.prompts.chunk_on_limit())
 
         # Ask about downloading attachments
         if self.prompts.get_download_attachments():
             attachments_dir = self.prompts.get_attachments_dir(output)
             cmd.extend(['--download-attachments', '--attachments-dir', attachments_dir])
 
-        # Use special executor that checks for limit if not already using chunks
-        if not use_chunks:
-            return self.execute_with_limit_check(cmd, token, query, output)
-        else:
-            return self.execute_command(cmd)
-    
-    def _run_channel_direct(self, cmd: List[str], args) -> int:
-        """Run channel export with direct arguments."""
-        if not args.token or not args.query:
-            print("❌ Error: --token and --query are required for channel export")
-            return 1
-        
-        cmd.extend(['-t', args.token, '-q', args.query])
-        self.cmd_builder.add_optional_param(cmd, '-o', args.output)
-        self.cmd_builder.add_flag_if_true(cmd, '--monthly-chunks', args.monthly_chunks)
-        
-        if args.max_results:
-            cmd.extend(['-m', str(args.max_results)])
-        
         return self.execute_command(cmd)
     
     def run_search_export(self, args) -> int:
         """Run search export."""
         cmd = self.cmd_builder.build_base_command('search')
         
-        if self.should_run_interactively(args, ['token', 'query']):
+        if self.should_run_interactively(args, 'search'):
             return self._run_search_interactive(cmd)
         else:
-            return self._run_search_direct(cmd, args)
+            return self.run_direct('search', cmd, args)
     
     def _run_search_interactive(self, cmd: List[str]) -> int:
         """Run search export interactively."""
-        token = self.prompts.get_token()
+        token = self.get_session_token('search')
         base_query = self.prompts.get_search_query()
         
         # Get time range preferences
@@ -527,75 +641,177 @@ class OperationHandler:
 
         return self.execute_command(cmd)
     
-    def _run_search_direct(self, cmd: List[str], args) -> int:
-        """Run search export with direct arguments."""
-        if not args.token or not args.query:
-            print("❌ Error: --token and --query are required for search")
-            return 1
-        
-        cmd.extend(['-t', args.token, '-q', args.query])
-        self.cmd_builder.add_optional_param(cmd, '-o', args.output)
-        
-        if args.max_results:
-            cmd.extend(['-m', str(args.max_results)])
-        
-        self.cmd_builder.add_flag_if_true(cmd, '--monthly-chunks', args.monthly_chunks)
-        
-        return self.execute_command(cmd)
-    
     def run_list_operation(self, args) -> int:
         """Run channel/DM listing."""
         cmd = self.cmd_builder.build_base_command('list')
         
-        if self.should_run_interactively(args, ['token']):
-            token = self.prompts.get_token()
+        if self.should_run_interactively(args, 'list'):
+            token = self.get_session_token('list')
             cmd.extend(['-t', token])
+            return self.execute_command(cmd)
         else:
-            if not args.token:
-                print("❌ Error: --token is required for listing")
-                return 1
-            cmd.extend(['-t', args.token])
-        
-        return self.execute_command(cmd)
+            return self.run_direct('list', cmd, args)
 
 
 class SlackCLI:
     """Main CLI coordinator class."""
     
+    # Operation -> OperationHandler method name
+    OPERATION_MAP = MappingProxyType({
+        'later': 'run_later_export',
+        'dm': 'run_dm_export',
+        'channel': 'run_channel_export',
+        'search': 'run_search_export',
+        'list': 'run_list_operation'
+    })
+    
     def __init__(self):
-        self.script_dir = os.path.dirname(os.path.abspath(__file__))
-        self.handler = OperationHandler(self.script_dir)
-        self.menu = MenuDisplay()
+        self.script_dir = SCRIPT_DIR
+        self._handler = None
+    
+    @property
+    def handler(self) -> OperationHandler:
+        """Operation handler, built on first use."""
+        if self._handler is None:
+            self._handler = OperationHandler(self.script_dir)
+        return self._handler
     
     def run(self, args) -> int:
         """Main entry point for CLI execution."""
-        operation = self._determine_operation(args)
-        
-        # Route to appropriate handler
-        operation_map = {
-            'later': self.handler.run_later_export,
-            'dm': self.handler.run_dm_export,
-            'channel': self.handler.run_channel_export,
-            'search': self.handler.run_search_export,
-            'list': self.handler.run_list_operation
-        }
+        if args.batch:
+            return self._run_batch(args)
+        if not args.operation or args.interactive:
+            return self._run_menu_session(args)
+        return self._run_operation(args.operation, args)
+    
+    def _run_menu_session(self, args) -> int:
+        """
+        Keep offering the main menu until the user exits.
+
+        Every export in the session runs in this process, so the tool modules
+        and their dependencies are only imported once. Returns the exit code of
+        the last operation run (0 if none was).
+        """
+        exit_code = 0
+        while True:
+            operation = MenuDisplay.show_main_menu()
+            if operation is None:
+                return exit_code
+            exit_code = self._run_operation(operation, args)
+            status = "finished" if exit_code == 0 else f"exited with code {exit_code}"
+            print(f"\n↩️  {operation} {status}; returning to the main menu")
+    
+    def _run_batch(self, args) -> int:
+        """
+        Run every operation listed in a JSON batch file, in order, in this process.
+
+        The file holds a list of objects keyed like the command-line options
+        (e.g. {"operation": "dm", "channel": "D123", "output": "dm.md"}); options
+        given on the command line, such as --token, apply to every entry, except
+        --output, which each entry must set for itself so exports never overwrite
+        one another. Entries never prompt, and the exit code is 1 if any of them failed.
+        """
+        import json
         
-        if operation in operation_map:
-            return operation_map[operation](args)
-        else:
+        try:
+            with open(args.batch, encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ Error: could not read batch file {args.batch}: {e}")
+            return 1
+        if not isinstance(entries, list):
+            print("❌ Error: batch file must contain a JSON list of operations")
+            return 1
+        
+        if args.output:
+            print("❌ Error: --output cannot be used with --batch; set \"output\" in each batch entry instead")
+            return 1
+        outputs = [entry.get('output') for entry in entries if isinstance(entry, dict) and entry.get('output')]
+        repeated = sorted({output for output in outputs if outputs.count(output) > 1})
+        if repeated:
+            print(f"❌ Error: batch entries share output files, so later ones would overwrite earlier ones: {', '.join(repeated)}")
+            return 1
+        
+        defaults = {key: value for key, value in vars(args).items() if key not in ('operation', 'batch')}
+        failures = 0
+        for number, entry in enumerate(entries, 1):
+            if not isinstance(entry, dict):
+                entry = {}
+            operation = entry.get('operation')
+            unknown = set(entry) - set(defaults) - {'operation'}
+            if operation not in self.OPERATION_MAP or unknown:
+                print(f"❌ Error: batch entry {number} is invalid (operation: {operation!r}, unknown keys: {sorted(unknown)})")
+                failures += 1
+                continue
+            
+            print(f"\n📦 Batch {number}/{len(entries)}: {operation}")
+            entry_args = SimpleNamespace(**{**defaults, **entry, 'interactive': False})
+            cmd = self.handler.cmd_builder.build_base_command(operation)
+            if self.handler.run_direct(operation, cmd, entry_args) != 0:
+                failures += 1
+        
+        print(f"\n📦 Batch complete: {len(entries) - failures}/{len(entries)} operations succeeded")
+        return 1 if failures else 0
+    
+    def _run_operation(self, operation: str, args) -> int:
+        """Route an operation to its handler method."""
+        # Resolve the handler method only once the operation is known
+        method_name = self.OPERATION_MAP.get(operation)
+        if method_name is None:
             print(f"❌ Unknown operation: {operation}")
             return 1
+        return getattr(self.handler, method_name)(args)
+
+
+
+def fast_parse_args(argv: List[str]) -> Optional[SimpleNamespace]:
+    """
+    Parse the common invocations without building the argparse parser.
+
+    Returns None for anything out of the ordinary (help, unknown or abbreviated
+    options, missing or invalid values), so the caller can fall back to
+    argparse and its usage errors.
+    """
+    parsed = {dest: None for dest, _ in VALUE_OPTIONS.values()}
+    parsed.update({dest: False for dest in SWITCH_OPTIONS.values()})
+    parsed['operation'] = None
+    
+    args = iter(argv)
+    for arg in args:
+        if arg.startswith('--') and '=' in arg:
+            # '--option=value' form; the value may start with '-' here, as with argparse
+            option, value = arg.split('=', 1)
+            if option not in VALUE_OPTIONS:
+                return None
+            dest, convert = VALUE_OPTIONS[option]
+            try:
+                parsed[dest] = convert(value)
+            except ValueError:
+                return None
+        elif arg in SWITCH_OPTIONS:
+            parsed[SWITCH_OPTIONS[arg]] = True
+        elif arg in VALUE_OPTIONS:
+            dest, convert = VALUE_OPTIONS[arg]
+            value = next(args, None)
+            if value is None or value.startswith('-'):
+                return None
+            try:
+                parsed[dest] = convert(value)
+            except ValueError:
+                return None
+        elif arg in OPERATIONS and parsed['operation'] is None:
+            parsed['operation'] = arg
+        else:
+            return None
     
-    def _determine_operation(self, args) -> str:
-        """Determine which operation to run."""
-        if not args.operation or args.interactive:
-            return self.menu.show_main_menu()
-        return args.operation
-
+    return SimpleNamespace(**parsed)
 
 
+@functools.lru_cache(maxsize=1)
 def create_parser():
-    """Create the main argument parser."""
+    """Create the main argument parser (built once and reused by repeated main() calls)."""
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description='Unified Slack Export CLI - Export DMs, channels, bookmarks and more',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -619,60 +835,45 @@ Examples:
   # List all channels and DMs
   python slack.py list -t "xoxp-token"
 
+  # Run several exports in one go (e.g. from cron)
+  python slack.py --batch nightly.json -t "xoxp-token"
+
 Interactive mode will guide you through the process step by step.
         """
     )
     
     # Main operation (optional for interactive mode)
     parser.add_argument('operation', nargs='?', 
-                       choices=['later', 'dm', 'channel', 'search', 'list'],
+                       choices=OPERATIONS,
                        help='What to export (omit for interactive mode)')
     
-    # Common arguments
-    parser.add_argument('-t', '--token', 
-                       help='Slack User OAuth Token (starts with xoxp-)')
-    parser.add_argument('-o', '--output',
-                       help='Output file path')
-    parser.add_argument('-i', '--interactive', action='store_true',
-                       help='Force interactive mode even when operation is specified')
-    
-    # DM-specific arguments
-    parser.add_argument('-c', '--channel',
-                       help='DM channel ID (for dm operation)')
-    parser.add_argument('-s', '--since',
-                       help='Start date YYYY-MM-DD (for dm operation)')
-    
-    # Search/Channel arguments  
-    parser.add_argument('-q', '--query',
-                       help='Search query or channel specification')
-    parser.add_argument('-m', '--max-results', type=int,
-                       help='Maximum number of results')
-    parser.add_argument('--monthly-chunks', action='store_true',
-                       help='Use monthly chunks for complete history')
-    
-    # Bookmarks arguments
-    parser.add_argument('--page-size', type=int,
-                       help='Page size for bookmarks fetching')
+    for flags, spec in ARG_SPECS:
+        parser.add_argument(*flags, **spec)
     
     return parser
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main entry point."""
-    parser = create_parser()
-    args = parser.parse_args()
+    if argv is None:
+        argv = sys.argv[1:]
+    args = fast_parse_args(argv) or create_parser().parse_args(argv)
     
     cli = SlackCLI()
     return cli.run(args)
 
 
-if __name__ == '__main__':
+def run_main(argv: Optional[List[str]] = None) -> int:
+    """Run main() with the top-level Ctrl-C and error handling; returns the exit code."""
     try:
-        exit_code = main()
-        sys.exit(exit_code)
+        return main(argv)
     except KeyboardInterrupt:
         print("\n\nOperation cancelled by user. Goodbye! 👋")
-        sys.exit(0)
+        return 0
     except Exception as e:
         print(f"\n❌ Unexpected error: {e}")
-        sys.exit(1)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(run_main())
@@ -5,20 +5,57 @@ Fetch Slack DM history using conversations.history API with standardized logging
 
 import argparse
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 
 # Import our standardized utilities
-from utils import SlackExporter, format_timestamp, sanitize_dirname
+from utils import SlackExporter, PROGRESS_INTERVAL, MAX_CONCURRENT_REQUESTS, HISTORY_WINDOWS, atomic_write, WRITE_BUFFER_SIZE, json_line, format_timestamp, ts_sort_key, format_files_markdown, format_attachments_markdown, format_reactions_markdown, sanitize_dirname
+
+
+def format_dm_message(message: Dict[str, Any]) -> str:
+    """Render one DM message as Markdown: everything below its "## Message N" heading."""
+    get = message.get
+    text = get('text', '')
+    
+    parts = [
+        f"**User:** {get('user', 'Unknown')}\n"
+        f"**Date:** {format_timestamp(get('ts', ''))}\n"
+        f"**Timestamp:** {get('ts', '')}\n\n"
+        "**Message:**\n\n",
+        f"{text}\n\n" if text else "*(No text content)*\n\n",
+        format_files_markdown(get('files', [])),
+        format_attachments_markdown(get('attachments', [])),
+        format_reactions_markdown(get('reactions', []))
+    ]
+    
+    # Thread info
+    if get('thread_ts'):
+        parts.append(f"**Thread:** Part of thread {get('thread_ts')}\n")
+        if get('reply_count', 0) > 0:
+            parts.append(f" - {get('reply_count')} replies\n")
+        parts.append("\n")
+    
+    parts.append("---\n\n")
+    return ''.join(parts)
+
+
+class HistoryFetchError(Exception):
+    """A conversations.history page that could not be fetched, leaving a gap in the export."""
 
 
 class SlackDMFetcher(SlackExporter):
     """Fetches DM conversation history from Slack."""
 
-    def __init__(self, token: str, download_dir: Optional[str] = None):
+    def __init__(self, token: str, download_dir: Optional[str] = None, jsonl_file: Optional[str] = None):
         super().__init__(token, "DMFetcher")
         self.download_dir = download_dir
+        self.jsonl_file = jsonl_file
+        # Messages collected so far across all time windows; windows page on worker threads
+        self.collected = 0
+        self._progress_lock = threading.Lock()
         
     def fetch_and_export(self, channel_id: str, output_file: str, since_date: str = "2025-01-01") -> int:
         """Fetch and save messages incrementally with progress tracking"""
@@ -34,8 +71,13 @@ class SlackDMFetcher(SlackExporter):
         self.logger.info(f"📋 Fetching messages from channel {channel_id} since {since_date}")
         self.logger.info(f"📁 Output file: {output_file}")
         
-        # First pass: collect all messages for accurate progress tracking
-        all_messages = self._collect_all_messages(channel_id, since_ts)
+        # First pass: collect (and render) all messages for accurate progress tracking
+        try:
+            all_messages = self._collect_all_messages(channel_id, since_ts)
+        except HistoryFetchError as e:
+            # Windows are fetched out of order, so a failure can sit anywhere in the range
+            self.logger.error(f"{e}; not writing {output_file}, it would be missing messages")
+            return 0
         
         if not all_messages:
             self.logger.warning("No messages found!")
@@ -45,7 +87,9 @@ class SlackDMFetcher(SlackExporter):
         self.logger.success(f"Found {total_count:,} messages to process")
 
         # Write messages to file with progress tracking
-        self._write_messages_to_file(all_messages, channel_id, since_date, output_file, self.download_dir)
+        self._write_messages_to_file(all_messages, channel_id, since_date, output_file)
+        if self.jsonl_file:
+            self._write_jsonl_file(all_messages, self.jsonl_file)
         
         # Summary
         export_time = (datetime.now() - start_time).total_seconds()
@@ -53,12 +97,15 @@ class SlackDMFetcher(SlackExporter):
         
         return total_count
     
-    def _collect_all_messages(self, channel_id: str, since_ts: float) -> List[Dict[str, Any]]:
-        """Collect all messages first for accurate progress tracking"""
-        
-        self.logger.phase(1, "Collecting all messages")
-        
-        all_messages = []
+    def _iter_history_pages(self, channel_id: str, oldest: float,
+                            latest: Optional[float] = None) -> Iterator[Tuple[List[Dict[str, Any]], bool]]:
+        """
+        Yield (messages, has_more) for each conversations.history page in a time range.
+
+        Pages come newest first. With `latest` set, both ends of the range are
+        inclusive, so adjacent windows can share an edge without losing messages.
+        Raises HistoryFetchError if a page cannot be fetched.
+        """
         cursor = None
         page_num = 1
         
@@ -68,126 +115,149 @@ class SlackDMFetcher(SlackExporter):
             params = {
                 'channel': channel_id,
                 'limit': 200,  # Max per request
-                'oldest': str(since_ts)
+                'oldest': str(oldest)
             }
+            if latest is not None:
+                params['latest'] = str(latest)
+                params['inclusive'] = 'true'
             if cursor:
                 params['cursor'] = cursor
             
             data = self.make_api_request("https://slack.com/api/conversations.history", params)
             if not data:
-                break
+                raise HistoryFetchError(f"Fetching conversations.history page {page_num} failed")
             
             messages = data.get('messages', [])
             if not messages:
                 self.logger.info("No more messages found", indent=1)
                 break
             
-            all_messages.extend(messages)
-            self.logger.progress(len(all_messages), len(all_messages), f"Collected {len(messages)} messages from page {page_num}")
+            # One shared count, updated and drawn under a lock so windows don't interleave
+            with self._progress_lock:
+                self.collected += len(messages)
+                self.logger.progress(self.collected, self.collected, f"Collected {len(messages)} more messages")
             
             # Check for more pages
-            if not data.get('has_more', False):
-                break
-                
-            cursor = data.get('response_metadata', {}).get('next_cursor')
+            cursor = data.get('response_metadata', {}).get('next_cursor') if data.get('has_more', False) else None
+            yield messages, bool(cursor)
             if not cursor:
                 break
             
             page_num += 1
+    
+    def _collect_all_messages(self, channel_id: str, since_ts: float) -> List[Tuple[str, str]]:
+        """
+        Collect all messages as (Markdown, JSON line) pairs, oldest first.
+
+        The first page shows whether there is more history. If there is, the rest
+        of the range is split into time windows that are paged through
+        concurrently, each rendering its messages (and downloading their files)
+        as they arrive. Only the rendered text is kept, not the API payloads; the
+        JSON line is empty unless a JSONL file was requested.
+        """
+        if self.download_dir:
+            self.logger.phase(1, "Collecting all messages and downloading attachments")
+        else:
+            self.logger.phase(1, "Collecting all messages")
         
-        # Sort messages by timestamp (oldest first)
-        all_messages.sort(key=lambda x: float(x.get('ts', 0)))
+        self.collected = 0
+        pages = self._iter_history_pages(channel_id, since_ts)
+        first_page = next(pages, None)
+        pages.close()
+        if first_page is None:
+            return []
+        
+        messages, has_more = first_page
+        boundary = min(ts_sort_key(message) for message in messages)
+        newest = self._render_page(messages)
+        rendered = []
+        
+        if has_more and boundary > since_ts:
+            # Everything older than the first page, in windows that share their edges
+            step = (boundary - since_ts) / HISTORY_WINDOWS
+            edges = [since_ts + step * i for i in range(HISTORY_WINDOWS)] + [boundary]
+            
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+                # map() keeps window order, so the windows come back oldest first
+                for window in executor.map(lambda edge: self._collect_window(channel_id, *edge), zip(edges, edges[1:])):
+                    rendered.extend(window)
+        rendered.extend(newest)
+        
+        # Everything is already in ts order; a message on a shared window edge
+        # arrives twice in a row, so only consecutive repeats need dropping
+        all_messages = []
+        last_ts = None
+        for ts, body, record in rendered:
+            if ts != last_ts:
+                all_messages.append((body, record))
+                last_ts = ts
         
         return all_messages
     
-    def _write_messages_to_file(self, messages: List[Dict[str, Any]], channel_id: str, since_date: str, output_file: str, download_dir: Optional[str] = None):
-        """Write messages to file with progress tracking"""
+    def _collect_window(self, channel_id: str, oldest: float, latest: float) -> List[Tuple[str, str, str]]:
+        """Page through one time window, rendering each page as it arrives; returns oldest first."""
+        pages = [self._render_page(messages)
+                 for messages, _ in self._iter_history_pages(channel_id, oldest, latest)]
+        # Pages arrive newest first
+        return [pair for page in reversed(pages) for pair in page]
+    
+    def _render_page(self, messages: List[Dict[str, Any]]) -> List[Tuple[str, str, str]]:
+        """
+        Download a page's files if requested, then render its messages.
 
-        # Download files if directory specified
-        if download_dir:
-            self.logger.phase(2, f"Downloading and writing {len(messages):,} messages to file")
-        else:
-            self.logger.phase(2, f"Writing {len(messages):,} messages to file")
+        Returns (ts, Markdown, JSON line) triples oldest first; Slack returns each
+        page newest first.
+        """
+        if self.download_dir:
+            for message in messages:
+                if message.get('files'):
+                    self.download_message_files(message, self.download_dir, "dm")
+        return [(message.get('ts', ''), format_dm_message(message), json_line(message) if self.jsonl_file else '')
+                for message in reversed(messages)]
+    
+    def _write_messages_to_file(self, messages: List[Tuple[str, str]], channel_id: str, since_date: str, output_file: str):
+        """Write rendered messages to file with progress tracking"""
+        self.logger.phase(2, f"Writing {len(messages):,} messages to file")
         
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with atomic_write(output_file, 'w', encoding='utf-8', errors='replace', buffering=WRITE_BUFFER_SIZE) as f:
             # Write header
-            f.write(f"# DM Conversation History\n\n")
-            f.write(f"**Channel ID:** {channel_id}\n")
-            f.write(f"**Messages since:** {since_date}\n")
-            f.write(f"**Export date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"**Total messages:** {len(messages)}\n\n")
-            f.write("---\n\n")
+            f.write(
+                "# DM Conversation History\n\n"
+                f"**Channel ID:** {channel_id}\n"
+                f"**Messages since:** {since_date}\n"
+                f"**Export date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                f"**Total messages:** {len(messages)}\n\n"
+                "---\n\n"
+            )
             
-            # Write messages
-            for i, message in enumerate(messages, 1):
-                f.write(f"## Message {i}\n\n")
-                f.write(f"**User:** {message.get('user', 'Unknown')}\n")
-                f.write(f"**Date:** {format_timestamp(message.get('ts', ''))}\n")
-                f.write(f"**Timestamp:** {message.get('ts', '')}\n\n")
-                
-                # Message content
-                f.write("**Message:**\n\n")
-                text = message.get('text', '')
-                if text:
-                    f.write(f"{text}\n\n")
-                else:
-                    f.write("*(No text content)*\n\n")
-                
-                # Files and attachments
-                files = message.get('files', [])
-                if files:
-                    # Download files if directory specified
-                    if download_dir:
-                        self.download_message_files(message, download_dir, "dm")
-
-                    f.write(f"**Files:** {len(files)} file(s)\n")
-                    for file_info in files:
-                        name = file_info.get('name', 'Unknown file')
-                        local_path = file_info.get('local_path')
-                        if local_path:
-                            f.write(f"- {name}\n")
-                            f.write(f"  - Downloaded: {local_path}\n")
-                            url = file_info.get('url_private', file_info.get('permalink', ''))
-                            f.write(f"  - Original URL: {url}\n")
-                        else:
-                            url = file_info.get('url_private', file_info.get('permalink', ''))
-                            f.write(f"- {name}: {url}\n")
-                    f.write("\n")
-                
-                attachments = message.get('attachments', [])
-                if attachments:
-                    f.write(f"**Attachments:** {len(attachments)} attachment(s)\n")
-                    for att in attachments:
-                        title = att.get('title', att.get('fallback', 'Attachment'))
-                        f.write(f"- {title}\n")
-                    f.write("\n")
-                
-                # Reactions
-                reactions = message.get('reactions', [])
-                if reactions:
-                    f.write("**Reactions:**\n")
-                    for reaction in reactions:
-                        name = reaction.get('name', '')
-                        count = reaction.get('count', 0)
-                        f.write(f"- :{name}: ({count})\n")
-                    f.write("\n")
-                
-                # Thread info
-                if message.get('thread_ts'):
-                    f.write(f"**Thread:** Part of thread {message.get('thread_ts')}\n")
-                    if message.get('reply_count', 0) > 0:
-                        f.write(f" - {message.get('reply_count')} replies\n")
-                    f.write("\n")
-                
-                f.write("---\n\n")
+            # Write messages - one write call per message, heading included
+            for i, (body, _) in enumerate(messages, 1):
+                f.write(f"## Message {i}\n\n{body}")
                 
                 # Update progress
-                self.logger.progress(i, len(messages), f"Writing message {i}")
+                if i % PROGRESS_INTERVAL == 0 or i == len(messages):
+                    self.logger.progress(i, len(messages), f"Writing message {i}")
         
         self.logger.success(f"Messages written to {output_file}")
+    
+    def _write_jsonl_file(self, messages: List[Tuple[str, str]], jsonl_file: str):
+        """Write the raw API messages, one JSON object per line, oldest first."""
+        with atomic_write(jsonl_file, 'w', encoding='utf-8', errors='replace', buffering=WRITE_BUFFER_SIZE) as f:
+            f.writelines(record for _, record in messages)
+        
+        self.logger.success(f"Raw messages written to {jsonl_file}")
+
 
+def jsonl_path_for(output: str) -> str:
+    """Return where --jsonl writes the raw messages for the Markdown export `output`."""
+    jsonl_file = str(Path(output).with_suffix('.jsonl'))
+    if jsonl_file == str(Path(output)):
+        # Output already ends in .jsonl; never let the raw messages overwrite the Markdown
+        jsonl_file = f'{output}.jsonl'
+    return jsonl_file
 
-def main():
+
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(
         description='Fetch Slack DM conversation history',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -217,8 +287,11 @@ Required Slack API scopes:
                         help='Download attachment files to disk')
     parser.add_argument('--attachments-dir', type=str,
                         help='Directory for downloaded attachments (default: <output>_attachments)')
+    parser.add_argument('--jsonl', action='store_true',
+                        help='Also write the raw API messages to <output>.jsonl, one per line '
+                             '(<output>.jsonl.jsonl if -o already ends in .jsonl)')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Default output filename
     if not args.output:
@@ -235,8 +308,10 @@ Required Slack API scopes:
             base_name = Path(args.output).stem
             download_dir = f'{base_name}_attachments'
 
+    jsonl_file = jsonl_path_for(args.output) if args.jsonl else None
+
     try:
-        fetcher = SlackDMFetcher(args.token, download_dir)
+        fetcher = SlackDMFetcher(args.token, download_dir, jsonl_file)
         message_count = fetcher.fetch_and_export(args.channel, args.output, args.since)
         
         if message_count > 0:
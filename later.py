@@ -6,81 +6,108 @@ Fetches all "Save for Later" messages from Slack with full context including
 channel names, user names, attachments, and reactions.
 """
 
-import json
 import sys
 import argparse
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator
 from pathlib import Path
 
 # Import our standardized utilities
-from utils import SlackExporter, format_timestamp, get_user_name, get_channel_name, sanitize_dirname
+from utils import SlackExporter, PROGRESS_INTERVAL, atomic_write, WRITE_BUFFER_SIZE, format_timestamp, ts_sort_key, format_attachments_markdown, format_files_markdown, write_json, extend_unique, sanitize_dirname
+
+
+def format_saved_message(index: int, msg: Dict[str, Any]) -> str:
+    """Render one enriched saved message as a Markdown section."""
+    user = msg['user_name']
+    if msg['username'] and msg['username'] != msg['user_name']:
+        user = f"{user} (@{msg['username']})"
+    
+    parts = [
+        f"## Saved Message {index}\n\n"
+        f"**Message Date:** {format_timestamp(msg['message_date'])}\n"
+        f"**Channel:** {msg['channel_name']} ({msg['channel_id']})\n"
+        f"**User:** {user} ({msg['user_id']})\n"
+    ]
+    
+    if msg['permalink']:
+        parts.append(f"**Permalink:** {msg['permalink']}\n")
+    
+    parts.append(f"\n**Message:**\n\n{msg['text']}\n\n")
+    parts.append(format_attachments_markdown(msg['attachments']))
+    parts.append(format_files_markdown(msg['files']))
+    
+    # Blocks (rich content)
+    if msg['blocks']:
+        parts.append(f"**Rich Content:** {len(msg['blocks'])} block(s)\n\n")
+    
+    # Thread info
+    if msg['thread_ts']:
+        parts.append(f"**Thread:** Part of thread {msg['thread_ts']}\n\n")
+    
+    parts.append("---\n\n")
+    return ''.join(parts)
 
 
 class SlackLaterFetcher(SlackExporter):
     """Fetches Slack 'Save for Later' messages."""
 
-    def __init__(self, token: str, download_dir: Optional[str] = None):
+    def __init__(self, token: str, download_dir: Optional[str] = None, keep_raw: bool = False):
         super().__init__(token, "LaterFetcher")
-        self.user_cache = {}
-        self.channel_cache = {}
         self.download_dir = download_dir
+        self.keep_raw = keep_raw
     
     def fetch_saved_messages(self, page_size: int = 100) -> List[Dict[str, Any]]:
         """Fetch all saved messages using the search API with 'is:saved' query."""
         self.logger.phase(1, "Fetching saved for later messages")
         
+        # Pages can shift while they are being fetched, so drop repeats as they arrive
         all_saved = []
-        page = 1
+        seen = set()
+        total = 0
         
-        while True:
-            params = {
-                'query': 'is:saved',
-                'count': page_size,
-                'page': page
-            }
-            
-            self.logger.api_call("search.messages", page=page)
-            data = self.make_api_request('https://slack.com/api/search.messages', params)
-            
-            if not data:
-                break
+        for page, messages_data in self.iter_search_pages('is:saved', page_size):
+            matches = messages_data['matches']
+            if page == 1:
+                total = messages_data.get('total', len(matches))
             
-            messages_data = data.get('messages', {})
-            matches = messages_data.get('matches', [])
-            
-            if not matches:
-                self.logger.info("No more saved messages found", indent=1)
-                break
-            
-            all_saved.extend(matches)
-            total = messages_data.get('total', len(all_saved))
+            extend_unique(all_saved, matches, seen)
             self.logger.progress(len(all_saved), total, f"Found {len(matches)} messages on page {page}")
-            
-            # Check if we have more pages
-            total_pages = messages_data.get('paging', {}).get('pages', 1)
-            if page >= total_pages:
-                break
-            
-            page += 1
         
         self.logger.success(f"Found {len(all_saved)} saved messages")
         return all_saved
     
-    def enrich_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Enrich messages with user names, channel names, and other metadata."""
+    def enrich_messages(self, messages: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Enrich messages with user names, channel names, and other metadata.
+
+        Names are resolved up front; the enriched records themselves are built
+        lazily so the Markdown export can write each one as soon as it exists.
+        """
         if not messages:
-            return messages
+            return iter(())
         
         self.logger.phase(2, f"Enriching {len(messages)} messages")
         
-        enriched_messages = []
+        # Channel names usually arrive inline with search results; only bare IDs need a lookup
+        self.prewarm_caches(
+            user_ids=(m['user'] for m in messages if m.get('user')),
+            channel_ids=(m['channel'] for m in messages if m.get('channel') and not isinstance(m['channel'], dict))
+        )
+        
+        return self._iter_enriched(messages)
+    
+    def _iter_enriched(self, messages: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield one enriched record per message, skipping any that fail."""
+        enriched_count = 0
         
         for i, message in enumerate(messages):
             try:
+                # Bind the lookup once; every field below is read through it
+                get = message.get
+                
                 # Get user and channel information
-                user_id = message.get('user', '')
-                channel_info = message.get('channel', {})
+                user_id = get('user', '')
+                channel_info = get('channel', {})
                 
                 if isinstance(channel_info, dict):
                     channel_id = channel_info.get('id', '')
@@ -89,115 +116,87 @@ class SlackLaterFetcher(SlackExporter):
                         channel_name = f"#{channel_name}"
                 else:
                     channel_id = str(channel_info) if channel_info else ''
-                    channel_name = get_channel_name(self.channel_cache, channel_id, self.session) if channel_id else 'Unknown Channel'
+                    channel_name = self.channel_name(channel_id)
                 
-                user_name = get_user_name(self.user_cache, user_id, self.session) if user_id else 'Unknown User'
+                user_name = self.user_name(user_id)
                 
                 # Create enriched message
+                files = get('files', [])
                 enriched_message = {
-                    'message_date': message.get('ts', ''),
+                    'message_date': get('ts', ''),
                     'channel_id': channel_id,
                     'channel_name': channel_name,
                     'user_id': user_id,
                     'user_name': user_name,
-                    'username': message.get('username', ''),  # Display name from search
-                    'text': message.get('text', ''),
-                    'permalink': message.get('permalink', ''),
-                    'attachments': message.get('attachments', []),
-                    'blocks': message.get('blocks', []),
-                    'files': message.get('files', []),
-                    'reactions': message.get('reactions', []),
-                    'thread_ts': message.get('thread_ts', ''),
-                    'raw_message': message  # Keep original for reference
+                    'username': get('username', ''),  # Display name from search
+                    'text': get('text', ''),
+                    'permalink': get('permalink', ''),
+                    'attachments': get('attachments', []),
+                    'blocks': get('blocks', []),
+                    'files': files,
+                    'reactions': get('reactions', []),
+                    'thread_ts': get('thread_ts', '')
                 }
+                if self.keep_raw:
+                    enriched_message['raw_message'] = message  # Keep original for reference
                 
-                enriched_messages.append(enriched_message)
-
                 # Download files if directory specified
-                if self.download_dir and enriched_message.get('files'):
+                if self.download_dir and files:
                     self.download_message_files(
                         enriched_message,
                         self.download_dir,
                         enriched_message['channel_name']
                     )
 
-                # Update progress
-                self.logger.progress(i + 1, len(messages), f"Processing message {i + 1}")
-
             except Exception as e:
                 self.logger.warning(f"Error enriching message {i + 1}: {e}", indent=1)
                 continue
 
-        self.logger.success(f"Enriched {len(enriched_messages)} messages")
-        return enriched_messages
+            enriched_count += 1
+            if (i + 1) % PROGRESS_INTERVAL == 0 or i + 1 == len(messages):
+                self.logger.progress(i + 1, len(messages), f"Processing message {i + 1}")
+            yield enriched_message
+
+        self.logger.success(f"Enriched {enriched_count} messages")
     
-    def export_to_markdown(self, messages: List[Dict[str, Any]], output_file: str):
-        """Export messages to Markdown format."""
+    def export_to_markdown(self, messages: Iterable[Dict[str, Any]], output_file: str,
+                           total: Optional[int] = None) -> int:
+        """
+        Export messages to Markdown format, writing each record as it arrives.
+
+        `total` is required when `messages` is a lazy iterator. Returns the
+        number of messages written; if records were skipped along the way, the
+        header's count is patched to that number once they are all written.
+        """
+        if total is None:
+            total = len(messages)
         self.logger.phase(3, f"Exporting to Markdown: {output_file}")
         
-        with open(output_file, 'w', encoding='utf-8') as f:
+        written = 0
+        
+        with atomic_write(output_file, 'w', encoding='utf-8', errors='replace', buffering=WRITE_BUFFER_SIZE) as f:
             # Header
-            f.write("# Slack Saved Messages (Later)\n\n")
-            f.write(f"**Export date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"**Total saved messages:** {len(messages)}\n\n")
-            f.write("---\n\n")
+            f.write(
+                "# Slack Saved Messages (Later)\n\n"
+                f"**Export date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                "**Total saved messages:** "
+            )
+            count_pos = f.tell()
+            f.write(f"{total}\n\n---\n\n")
             
-            # Messages
+            # Messages - each record is formatted in memory and written in a single call
             for i, msg in enumerate(messages, 1):
-                f.write(f"## Saved Message {i}\n\n")
-                
-                # Metadata
-                f.write(f"**Message Date:** {format_timestamp(msg['message_date'])}\n")
-                f.write(f"**Channel:** {msg['channel_name']} ({msg['channel_id']})\n")
-                f.write(f"**User:** {msg['user_name']}")
-                if msg['username'] and msg['username'] != msg['user_name']:
-                    f.write(f" (@{msg['username']})")
-                f.write(f" ({msg['user_id']})\n")
-                
-                if msg['permalink']:
-                    f.write(f"**Permalink:** {msg['permalink']}\n")
-                
-                f.write("\n**Message:**\n\n")
-                f.write(f"{msg['text']}\n\n")
-                
-                # Attachments
-                if msg['attachments']:
-                    f.write(f"**Attachments:** {len(msg['attachments'])} attachment(s)\n")
-                    for att in msg['attachments']:
-                        title = att.get('title', att.get('fallback', 'Attachment'))
-                        f.write(f"- {title}\n")
-                    f.write("\n")
-                
-                # Files
-                if msg['files']:
-                    f.write(f"**Files:** {len(msg['files'])} file(s)\n")
-                    for file_info in msg['files']:
-                        name = file_info.get('name', 'Unknown file')
-                        local_path = file_info.get('local_path')
-                        if local_path:
-                            f.write(f"- {name}\n")
-                            f.write(f"  - Downloaded: {local_path}\n")
-                            url = file_info.get('url_private', file_info.get('permalink', ''))
-                            f.write(f"  - Original URL: {url}\n")
-                        else:
-                            url = file_info.get('url_private', file_info.get('permalink', ''))
-                            f.write(f"- {name}: {url}\n")
-                    f.write("\n")
-                
-                # Blocks (rich content)
-                if msg['blocks']:
-                    f.write(f"**Rich Content:** {len(msg['blocks'])} block(s)\n\n")
-                
-                # Thread info
-                if msg['thread_ts']:
-                    f.write(f"**Thread:** Part of thread {msg['thread_ts']}\n\n")
-                
-                f.write("---\n\n")
-                
-                # Update progress
-                self.logger.progress(i, len(messages), f"Writing message {i}")
+                f.write(format_saved_message(i, msg))
+                written = i
+            
+            # Records that failed enrichment were skipped; count only what was written.
+            # The written count never has more digits than total, so it fits in place.
+            if written != total:
+                f.seek(count_pos)
+                f.write(str(written).ljust(len(str(total))))
         
         self.logger.success(f"Exported to {output_file}")
+        return written
     
     def export_to_json(self, messages: List[Dict[str, Any]], output_file: str):
         """Export messages to JSON format."""
@@ -209,8 +208,7 @@ class SlackLaterFetcher(SlackExporter):
             'messages': messages
         }
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False)
+        write_json(export_data, output_file)
         
         self.logger.success(f"Exported to {output_file}")
     
@@ -226,30 +224,31 @@ class SlackLaterFetcher(SlackExporter):
                 self.logger.warning("No saved messages found")
                 return 0
             
-            # Enrich messages
+            # Sort by message date (most recent first) before enriching, so
+            # Markdown records can stream straight to disk in order
+            saved_messages.sort(key=ts_sort_key, reverse=True)
             enriched_messages = self.enrich_messages(saved_messages)
             
-            # Sort by message date (most recent first)
-            enriched_messages.sort(key=lambda x: float(x.get('message_date', 0)), reverse=True)
-            
             # Export based on file extension
             if output_file.endswith('.json'):
+                enriched_messages = list(enriched_messages)
                 self.export_to_json(enriched_messages, output_file)
+                exported_count = len(enriched_messages)
             else:
-                self.export_to_markdown(enriched_messages, output_file)
+                exported_count = self.export_to_markdown(enriched_messages, output_file, total=len(saved_messages))
             
             # Summary
             export_time = (datetime.now() - start_time).total_seconds()
-            self.export_summary(output_file, len(enriched_messages), export_time)
+            self.export_summary(output_file, exported_count, export_time)
             
-            return len(enriched_messages)
+            return exported_count
             
         except Exception as e:
             self.logger.error(f"Export failed: {e}")
             return 0
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(
         description='Fetch Slack saved messages (Save for Later)',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -257,6 +256,7 @@ def main():
 Examples:
   python later.py -t "xoxp-token" -o saved_messages.md
   python later.py -t "xoxp-token" -o saved_messages.json --page-size 50
+  python later.py -t "xoxp-token" -o saved_messages.json --keep-raw
 
 This tool fetches messages you've saved using Slack's "Save for Later" feature.
 
@@ -277,8 +277,10 @@ Required Slack API scopes:
                         help='Download attachment files to disk')
     parser.add_argument('--attachments-dir', type=str,
                         help='Directory for downloaded attachments (default: <output>_attachments)')
+    parser.add_argument('--keep-raw', action='store_true',
+                        help='Include the original API message as raw_message in JSON output')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Default output filename
     if not args.output:
@@ -296,7 +298,7 @@ Required Slack API scopes:
             download_dir = f'{base_name}_attachments'
 
     try:
-        fetcher = SlackLaterFetcher(args.token, download_dir)
+        fetcher = SlackLaterFetcher(args.token, download_dir, keep_raw=args.keep_raw)
         message_count = fetcher.fetch_and_export(args.output, args.page_size)
         
         if message_count > 0:
@@ -5,10 +5,10 @@ List all Slack conversations to find channel IDs with standardized logging
 
 import argparse
 import sys
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # Import our standardized utilities
-from utils import SlackExporter, get_user_name
+from utils import SlackExporter
 
 
 class SlackConversationLister(SlackExporter):
@@ -16,7 +16,6 @@ class SlackConversationLister(SlackExporter):
     
     def __init__(self, token: str):
         super().__init__(token, "ConversationLister")
-        self.user_cache = {}
     
     def list_all_conversations(self) -> Dict[str, List[Dict[str, Any]]]:
         """List all conversations accessible to the token"""
@@ -123,11 +122,13 @@ class SlackConversationLister(SlackExporter):
         if direct_messages:
             print(f"\n💬 Direct Message Channels ({len(direct_messages)}):")
             
-            # Get user info for DMs (show first 10, then summary)
-            for i, dm in enumerate(direct_messages[:10]):
+            # Get user info for DMs (show first 10, then summary), resolved together up front
+            shown = direct_messages[:10]
+            self.prewarm_caches(user_ids=(dm['user'] for dm in shown if dm.get('user')))
+            for i, dm in enumerate(shown):
                 channel_id = dm.get('id', 'Unknown')
                 user_id = dm.get('user', 'Unknown')
-                user_name = get_user_name(self.user_cache, user_id, self.session) if user_id != 'Unknown' else 'Unknown User'
+                user_name = self.user_name(user_id) if user_id != 'Unknown' else 'Unknown User'
                 print(f"  ID: {channel_id} - User: {user_name} ({user_id})")
             
             if len(direct_messages) > 10:
@@ -149,7 +150,7 @@ class SlackConversationLister(SlackExporter):
         self.logger.success("Conversation listing complete")
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(
         description='List all Slack conversations to find channel IDs',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -171,7 +172,7 @@ Required Slack API scopes:
     parser.add_argument('-t', '--token', required=True,
                         help='Slack User OAuth Token (starts with xoxp-)')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     try:
         lister = SlackConversationLister(args.token)
@@ -7,16 +7,16 @@ Supports complex search queries and monthly chunking for complete history.
 """
 
 import argparse
-import json
+import re
 import sys
 import calendar
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Iterator, Any
+from typing import Dict, List, Optional, Iterator, Any, Tuple
 from dataclasses import dataclass
 
 # Import our standardized utilities
-from utils import SlackExporter, format_timestamp, get_user_name, get_channel_name, sanitize_dirname
+from utils import SlackExporter, PROGRESS_INTERVAL, atomic_write, WRITE_BUFFER_SIZE, write_json, json_line, format_timestamp, ts_sort_key, format_files_markdown, sanitize_dirname, message_channel_id, extend_unique
 
 
 @dataclass
@@ -29,6 +29,54 @@ class SearchConfig:
     start_date: Optional[str] = None
     end_date: Optional[str] = None
     download_dir: Optional[str] = None
+    auto_chunk_on_limit: bool = False
+
+
+# Date bounds in a search query, carried over when switching to monthly chunks
+AFTER_RE = re.compile(r'after:(\d{4}-\d{2}-\d{2})')
+BEFORE_RE = re.compile(r'before:(\d{4}-\d{2}-\d{2})')
+
+
+def split_date_bounds(query: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Split a query into its base part and its after:/before: dates (None when absent)."""
+    after_match = AFTER_RE.search(query)
+    before_match = BEFORE_RE.search(query)
+    # The base query ends at the first date filter; slice once instead of splitting twice
+    cut = len(query)
+    for needle in (' after:', ' before:'):
+        index = query.find(needle, 0, cut)
+        if index >= 0:
+            cut = index
+    base_query = query[:cut].strip()
+    return (base_query,
+            after_match.group(1) if after_match else None,
+            before_match.group(1) if before_match else None)
+
+
+def format_search_message(index: int, msg: Dict[str, Any]) -> str:
+    """Render one search result as a Markdown section."""
+    get = msg.get
+    parts = [
+        f"## Message {index}\n\n"
+        f"**Date:** {get('formatted_date', format_timestamp(get('ts', '')))}\n"
+        f"**User:** {get('user_name', get('username', 'Unknown'))}\n"
+        f"**Channel:** {get('channel_name', 'Unknown')}\n"
+    ]
+    
+    if get('permalink'):
+        parts.append(f"**Link:** {msg['permalink']}\n")
+    
+    parts.append(f"\n**Message:**\n\n{get('text', '*(No text)*')}\n\n")
+    
+    # Attachments
+    if get('attachments'):
+        parts.append(f"**Attachments:** {len(msg['attachments'])} attachment(s)\n\n")
+    
+    # Files
+    parts.append(format_files_markdown(get('files', [])))
+    
+    parts.append("---\n\n")
+    return ''.join(parts)
 
 
 class SlackPostsFetcher(SlackExporter):
@@ -36,8 +84,6 @@ class SlackPostsFetcher(SlackExporter):
 
     def __init__(self, token: str, download_dir: Optional[str] = None):
         super().__init__(token, "PostsFetcher")
-        self.user_cache = {}
-        self.channel_cache = {}
         self.download_dir = download_dir
     
     def search_messages(self, config: SearchConfig) -> List[Dict]:
@@ -53,42 +99,24 @@ class SlackPostsFetcher(SlackExporter):
         """Simple search without date chunking."""
         self.logger.phase(1, f"Searching messages: '{config.query}'")
         
+        # Keep the page size fixed across pages so page offsets stay aligned
+        page_size = min(config.page_size, config.max_results)
+        if page_size <= 0:
+            self.logger.warning("Nothing to search: max results and page size must be positive")
+            return []
+        max_pages = -(-config.max_results // page_size)
         all_messages = []
-        page = 1
         
-        while len(all_messages) < config.max_results:
-            self.logger.api_call("search.messages", page=page)
-            
-            params = {
-                'query': config.query,
-                'count': min(config.page_size, config.max_results - len(all_messages)),
-                'page': page
-            }
-            
-            data = self.make_api_request('https://slack.com/api/search.messages', params)
-            if not data:
-                break
-            
-            messages_data = data.get('messages', {})
-            matches = messages_data.get('matches', [])
-            
-            if not matches:
-                self.logger.info("No more messages found", indent=1)
-                break
-            
+        for page, messages_data in self.iter_search_pages(config.query, page_size, max_pages):
+            matches = messages_data['matches']
             all_messages.extend(matches)
-            self.logger.progress(len(all_messages), min(config.max_results, messages_data.get('total', len(all_messages))), 
+            found = min(len(all_messages), config.max_results)
+            self.logger.progress(found, min(config.max_results, messages_data.get('total', found)), 
                                f"Found {len(matches)} messages on page {page}")
-            
-            # Check pagination
-            paging = messages_data.get('paging', {})
-            if page >= paging.get('pages', 1):
-                break
-            
-            page += 1
         
+        all_messages = all_messages[:config.max_results]
         self.logger.success(f"Found {len(all_messages)} messages")
-        return all_messages[:config.max_results]
+        return all_messages
     
     def _search_with_monthly_chunks(self, config: SearchConfig) -> List[Dict]:
         """Search using monthly date chunks for complete history."""
@@ -106,6 +134,7 @@ class SlackPostsFetcher(SlackExporter):
             end_date = datetime.now()
         
         all_messages = []
+        seen = set()  # Month boundaries overlap, so dedupe as each month arrives
         
         for month_start, month_end in self._generate_monthly_chunks(start_date, end_date):
             month_query = f"{config.query} after:{month_start.strftime('%Y-%m-%d')} before:{month_end.strftime('%Y-%m-%d')}"
@@ -119,23 +148,37 @@ class SlackPostsFetcher(SlackExporter):
             )
             
             month_messages = self._search_simple(month_config)
-            all_messages.extend(month_messages)
+            extend_unique(all_messages, month_messages, seen)
             
             if len(month_messages) > 0:
                 self.logger.progress(len(all_messages), len(all_messages), 
                                    f"Found {len(month_messages)} messages in {month_start.strftime('%Y-%m')}")
         
-        # Remove duplicates based on timestamp
-        seen = set()
-        unique_messages = []
-        for msg in all_messages:
-            ts = msg.get('ts', '')
-            if ts not in seen:
-                seen.add(ts)
-                unique_messages.append(msg)
+        self.logger.success(f"Found {len(all_messages)} unique messages across all months")
+        return all_messages
+    
+    def _search_after_limit(self, config: SearchConfig) -> List[Dict]:
+        """Repeat a search that hit --max-results as monthly chunks, keeping its date range."""
+        base_query, start_date, end_date = split_date_bounds(config.query)
+        
+        self.logger.info("✨ Result limit reached; switching to monthly chunks for complete history")
+        if start_date or end_date:
+            date_range = []
+            if start_date:
+                date_range.append(f"from {start_date}")
+            if end_date:
+                date_range.append(f"to {end_date}")
+            self.logger.info(f"Within your specified range: {' '.join(date_range)}", indent=1)
         
-        self.logger.success(f"Found {len(unique_messages)} unique messages across all months")
-        return unique_messages
+        chunk_config = SearchConfig(
+            query=base_query,
+            page_size=config.page_size,
+            monthly_chunks=True,
+            start_date=start_date,
+            end_date=end_date,
+            download_dir=config.download_dir
+        )
+        return self._search_with_monthly_chunks(chunk_config)
     
     def _generate_monthly_chunks(self, start_date: datetime, end_date: datetime) -> Iterator[tuple]:
         """Generate monthly date chunks."""
@@ -158,101 +201,70 @@ class SlackPostsFetcher(SlackExporter):
                 current = current.replace(month=current.month + 1)
     
     def enrich_messages(self, messages: List[Dict]) -> List[Dict]:
-        """Enrich messages with user and channel names."""
+        """
+        Enrich messages with user and channel names.
+
+        The search results are owned by this exporter, so the resolved fields are
+        added to each message in place rather than to a per-message copy.
+        """
         if not messages:
             return messages
 
         self.logger.phase(2, f"Enriching {len(messages)} messages")
 
-        enriched_messages = []
+        self.prewarm_caches(
+            user_ids=(m['user'] for m in messages if m.get('user')),
+            channel_ids=(message_channel_id(m) for m in messages if m.get('channel'))
+        )
 
         for i, msg in enumerate(messages):
             try:
                 # Get user and channel names
-                user_id = msg.get('user', '')
-                channel_id = msg.get('channel', {}).get('id', '') if isinstance(msg.get('channel'), dict) else msg.get('channel', '')
-
-                user_name = get_user_name(self.user_cache, user_id, self.session) if user_id else 'Unknown User'
-                channel_name = get_channel_name(self.channel_cache, channel_id, self.session) if channel_id else 'Unknown Channel'
-
-                # Create enriched message
-                enriched_msg = msg.copy()
-                enriched_msg['user_name'] = user_name
-                enriched_msg['channel_name'] = channel_name
-                enriched_msg['formatted_date'] = format_timestamp(msg.get('ts', ''))
+                msg['user_name'] = self.user_name(msg.get('user', ''))
+                msg['channel_name'] = self.channel_name(message_channel_id(msg))
+                msg['formatted_date'] = format_timestamp(msg.get('ts', ''))
 
                 # Download files if directory specified
-                if self.download_dir and enriched_msg.get('files'):
+                if self.download_dir and msg.get('files'):
                     self.download_message_files(
-                        enriched_msg,
+                        msg,
                         self.download_dir,
-                        enriched_msg['channel_name']
+                        msg['channel_name']
                     )
 
-                enriched_messages.append(enriched_msg)
-
                 # Update progress
-                self.logger.progress(i + 1, len(messages), f"Processing message {i + 1}")
+                if (i + 1) % PROGRESS_INTERVAL == 0 or i + 1 == len(messages):
+                    self.logger.progress(i + 1, len(messages), f"Processing message {i + 1}")
 
             except Exception as e:
+                # The message is still exported, with whatever fields were resolved
                 self.logger.warning(f"Error enriching message {i + 1}: {e}", indent=1)
-                enriched_messages.append(msg)  # Include original if enrichment fails
                 continue
 
-        self.logger.success(f"Enriched {len(enriched_messages)} messages")
-        return enriched_messages
+        self.logger.success(f"Enriched {len(messages)} messages")
+        return messages
     
     def export_to_markdown(self, messages: List[Dict], output_file: str, query: str):
         """Export messages to Markdown format."""
         self.logger.phase(3, f"Exporting to Markdown: {output_file}")
         
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with atomic_write(output_file, 'w', encoding='utf-8', errors='replace', buffering=WRITE_BUFFER_SIZE) as f:
             # Header
-            f.write("# Slack Search Results\n\n")
-            f.write(f"**Search Query:** `{query}`\n")
-            f.write(f"**Export Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"**Total Messages:** {len(messages)}\n\n")
-            f.write("---\n\n")
+            f.write(
+                "# Slack Search Results\n\n"
+                f"**Search Query:** `{query}`\n"
+                f"**Export Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                f"**Total Messages:** {len(messages)}\n\n"
+                "---\n\n"
+            )
             
-            # Messages
+            # Messages - each one is formatted in memory and written in a single call
             for i, msg in enumerate(messages, 1):
-                f.write(f"## Message {i}\n\n")
-                
-                # Metadata
-                f.write(f"**Date:** {msg.get('formatted_date', format_timestamp(msg.get('ts', '')))}\n")
-                f.write(f"**User:** {msg.get('user_name', msg.get('username', 'Unknown'))}\n")
-                f.write(f"**Channel:** {msg.get('channel_name', 'Unknown')}\n")
-                
-                if msg.get('permalink'):
-                    f.write(f"**Link:** {msg['permalink']}\n")
-                
-                f.write("\n**Message:**\n\n")
-                f.write(f"{msg.get('text', '*(No text)*')}\n\n")
-
-                # Attachments
-                if msg.get('attachments'):
-                    f.write(f"**Attachments:** {len(msg['attachments'])} attachment(s)\n\n")
-
-                # Files
-                if msg.get('files'):
-                    f.write(f"**Files:** {len(msg['files'])} file(s)\n")
-                    for file_info in msg['files']:
-                        name = file_info.get('name', 'Unknown file')
-                        local_path = file_info.get('local_path')
-                        if local_path:
-                            f.write(f"- {name}\n")
-                            f.write(f"  - Downloaded: {local_path}\n")
-                            url = file_info.get('url_private', file_info.get('permalink', ''))
-                            f.write(f"  - Original URL: {url}\n")
-                        else:
-                            url = file_info.get('url_private', file_info.get('permalink', ''))
-                            f.write(f"- {name}: {url}\n")
-                    f.write("\n")
-                
-                f.write("---\n\n")
+                f.write(format_search_message(i, msg))
                 
                 # Update progress
-                self.logger.progress(i, len(messages), f"Writing message {i}")
+                if i % PROGRESS_INTERVAL == 0 or i == len(messages):
+                    self.logger.progress(i, len(messages), f"Writing message {i}")
         
         self.logger.success(f"Exported to {output_file}")
     
@@ -267,8 +279,7 @@ class SlackPostsFetcher(SlackExporter):
             'messages': messages
         }
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False)
+        write_json(export_data, output_file)
         
         self.logger.success(f"Exported to {output_file}")
     
@@ -276,13 +287,13 @@ class SlackPostsFetcher(SlackExporter):
         """Export messages to JSONL format."""
         self.logger.phase(3, f"Exporting to JSONL: {output_file}")
         
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with atomic_write(output_file, 'w', encoding='utf-8', errors='replace', buffering=WRITE_BUFFER_SIZE) as f:
             for i, msg in enumerate(messages, 1):
-                json.dump(msg, f, ensure_ascii=False)
-                f.write('\n')
+                f.write(json_line(msg))
                 
                 # Update progress
-                self.logger.progress(i, len(messages), f"Writing message {i}")
+                if i % PROGRESS_INTERVAL == 0 or i == len(messages):
+                    self.logger.progress(i, len(messages), f"Writing message {i}")
         
         self.logger.success(f"Exported to {output_file}")
     
@@ -300,12 +311,16 @@ class SlackPostsFetcher(SlackExporter):
             
             # Check if we likely hit the limit
             hit_limit = len(messages) >= config.max_results and not config.monthly_chunks
+            if hit_limit and config.auto_chunk_on_limit:
+                # Switch within this run, before anything is enriched or written
+                messages = self._search_after_limit(config) or messages
+                hit_limit = False
             
             # Enrich messages
             enriched_messages = self.enrich_messages(messages)
             
             # Sort by timestamp (newest first)
-            enriched_messages.sort(key=lambda x: float(x.get('ts', 0)), reverse=True)
+            enriched_messages.sort(key=ts_sort_key, reverse=True)
             
             # Export based on file extension
             if output_file.endswith('.json'):
@@ -327,7 +342,7 @@ class SlackPostsFetcher(SlackExporter):
             return 0, False
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(
         description='Fetch Slack messages using search API',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -374,12 +389,18 @@ Required Slack API scopes:
                         help='Start date for monthly chunks (YYYY-MM-DD, default: 2 years ago)')
     parser.add_argument('--end-date', type=str,
                         help='End date for monthly chunks (YYYY-MM-DD, default: today)')
+    parser.add_argument('--auto-chunk-on-limit', action='store_true',
+                        help='If --max-results is reached, switch to monthly chunks within the query\'s date range')
     parser.add_argument('--download-attachments', action='store_true',
                         help='Download attachment files to disk')
     parser.add_argument('--attachments-dir', type=str,
                         help='Directory for downloaded attachments (default: <output>_attachments)')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.max_results <= 0:
+        parser.error('--max-results must be a positive number')
+    if args.page_size <= 0:
+        parser.error('--page-size must be a positive number')
 
     # Default output filename
     if not args.output:
@@ -404,7 +425,8 @@ Required Slack API scopes:
         monthly_chunks=args.monthly_chunks,
         start_date=args.start_date,
         end_date=args.end_date,
-        download_dir=download_dir
+        download_dir=download_dir,
+        auto_chunk_on_limit=args.auto_chunk_on_limit
     )
 
     try:
@@ -6,22 +6,31 @@ A unified tool for exporting Slack data with clean, consistent interface.
 """
 
 import sys
-import subprocess
 import os
-from pathlib import Path
 
 def main():
     """Main entry point that delegates to the CLI."""
-    script_dir = Path(__file__).parent
-    cli_script = script_dir / "cli.py"
+    # os.path rather than pathlib: this runs on every start, including --help
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    cli_script = os.path.join(script_dir, "cli.py")
     
-    if not cli_script.exists():
+    if not os.path.exists(cli_script):
         print("❌ Error: cli.py not found")
         return 1
     
-    # Pass all arguments to the CLI script
-    cmd = [sys.executable, str(cli_script)] + sys.argv[1:]
-    return subprocess.run(cmd).returncode
+    # SLACK_CLI_SUBPROCESS=1 keeps the old behaviour of running cli.py in its own interpreter
+    if os.environ.get('SLACK_CLI_SUBPROCESS') == '1':
+        import subprocess
+        cmd = [sys.executable, cli_script] + sys.argv[1:]
+        # close_fds=False keeps CPython on its posix_spawn fast path; stdio is inherited as-is
+        with subprocess.Popen(cmd, close_fds=False) as proc:
+            return proc.wait()
+    
+    # Otherwise run the CLI in this interpreter, skipping a second startup
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    import cli
+    return cli.run_main(sys.argv[1:])
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -3,8 +3,17 @@
 Test script to demonstrate standardized logging and backoff mechanisms
 """
 
+import contextlib
+import io
+import json
+import os
+import tempfile
 import time
-from utils import SlackLogger, SlackRateLimiter
+
+import cli
+from history import jsonl_path_for
+from utils import (CHANNEL_NAME_TTL, USER_NAME_TTL, NameStore, SlackLogger,
+                   SlackRateLimiter, atomic_write)
 
 def test_logging():
     """Test the standardized logging format."""
@@ -46,10 +55,181 @@ def test_rate_limiter():
     
     logger.success("Rate limiting test complete")
 
+def test_name_store():
+    """Test the on-disk name cache: TTL expiry, the save/load round trip and eviction."""
+    with tempfile.TemporaryDirectory() as tmp:
+        # NAME_CACHE_DIR is fixed at import, so point a store at the temp dir directly
+        path = os.path.join(tmp, 'slack-cli-utils', 'names.json')
+        os.makedirs(os.path.dirname(path))
+        now = time.time()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'users': {'U1': ['alice', now - 60], 'U2': ['bob', now - USER_NAME_TTL - 60]},
+                'channels': {'C1': ['general', now - 60], 'C2': ['random', now - CHANNEL_NAME_TTL - 60]},
+            }, f)
+        
+        # Expired names are not loaded
+        store = NameStore(path)
+        assert dict(store.users) == {'U1': 'alice'}, dict(store.users)
+        assert dict(store.channels) == {'C1': 'general'}, dict(store.channels)
+        
+        # New names are saved; failed lookups (the bare ID) are not, and loaded names keep their age
+        store.users['U3'] = 'carol'
+        store.users['U4'] = 'U4'
+        store.save()
+        reloaded = NameStore(path)
+        assert dict(reloaded.users) == {'U1': 'alice', 'U3': 'carol'}, dict(reloaded.users)
+        assert reloaded._saved_at['users', 'U1'] == store._saved_at['users', 'U1'] < now
+        
+        # Names the FIFOCache evicted are dropped from the saved timestamps as well
+        reloaded.users.capacity = 2
+        reloaded.users['U5'] = 'dave'
+        reloaded.save()
+        assert ('users', 'U1') not in reloaded._saved_at
+        assert dict(NameStore(path).users) == {'U3': 'carol', 'U5': 'dave'}
+    
+    print("✅ Name store test complete")
+
+# Invocations fast_parse_args must parse exactly as argparse does
+FAST_PARSE_CASES = [
+    [],
+    ['list', '-t', 'xoxp-1'],
+    ['dm', '--token', 'xoxp-1', '-c', 'D123', '-s', '2024-01-01', '-o', 'dm.md', '--jsonl'],
+    ['search', '-q', 'from:@alice', '-m', '50', '--page-size', '100', '--monthly-chunks', '--keep-raw'],
+    ['-i', 'later'],
+    ['channel', '-c', 'C1', '-c', 'C2'],   # last value wins
+    ['search', '--query=from:@alice', '--max-results=25', '--token=xoxp-1'],
+    ['dm', '--channel=D1', '--since=-1'],  # '=' lets a value start with '-'
+    ['search', '--query=a=b', '-t', 'xoxp-1'],
+]
+
+# Invocations it must hand back to argparse (returns None)
+FAST_PARSE_FALLBACKS = [
+    ['-h'],
+    ['list', '--help'],
+    ['list', '--bogus'],
+    ['list', '--tok', 'xoxp-1'],            # abbreviation
+    ['list', '-t'],                         # missing value
+    ['search', '-q', 'x', '-m', 'lots'],    # non-int value
+    ['list', 'dm'],                         # second operation
+    ['frobnicate'],
+    ['list', '--bogus=1'],
+    ['list', '--tok=xoxp-1'],
+    ['search', '--max-results=lots'],
+    ['list', '--jsonl=yes'],                # switches take no value
+]
+
+def test_fast_parse_args():
+    """Test the hand-rolled parser against argparse, and its fallbacks."""
+    parser = cli.create_parser()
+    for argv in FAST_PARSE_CASES:
+        assert vars(cli.fast_parse_args(argv)) == vars(parser.parse_args(argv)), argv
+    for argv in FAST_PARSE_FALLBACKS:
+        assert cli.fast_parse_args(argv) is None, argv
+    
+    print("✅ Fast argument parsing test complete")
+
+def test_jsonl_path():
+    """Test that the --jsonl sidecar never lands on the Markdown output."""
+    cases = {
+        'dm.md': 'dm.jsonl',
+        'exports/dm': 'exports/dm.jsonl',
+        'dm.backup.md': 'dm.backup.jsonl',
+        'dm.jsonl': 'dm.jsonl.jsonl',
+        'exports/dm.jsonl': 'exports/dm.jsonl.jsonl',
+    }
+    for output, expected in cases.items():
+        assert jsonl_path_for(output) == expected, (output, jsonl_path_for(output))
+        assert jsonl_path_for(output) != output
+    
+    print("✅ JSONL path test complete")
+
+def test_atomic_write():
+    """Test that a failed write leaves the previous export intact and no temp file behind."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'export.md')
+        with atomic_write(path, 'w', encoding='utf-8') as f:
+            f.write('first export')
+        
+        try:
+            with atomic_write(path, 'w', encoding='utf-8') as f:
+                f.write('partial second export')
+                raise KeyboardInterrupt
+        except KeyboardInterrupt:
+            pass
+        else:
+            raise AssertionError("atomic_write swallowed the exception")
+        
+        with open(path, encoding='utf-8') as f:
+            assert f.read() == 'first export'
+        assert os.listdir(tmp) == ['export.md'], os.listdir(tmp)
+    
+    print("✅ Atomic write test complete")
+
+def run_batch(entries, *argv):
+    """Run cli's batch mode over `entries` with run_tool mocked; returns (exit code, commands, output)."""
+    commands = []
+    
+    def fake_run_tool(cmd):
+        commands.append(cmd[2:])
+        return 1 if '--fail' in cmd[2:] else 0
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        batch_file = os.path.join(tmp, 'batch.json')
+        with open(batch_file, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        
+        app = cli.SlackCLI()
+        app.handler.run_tool = fake_run_tool
+        args = cli.create_parser().parse_args(['--batch', batch_file] + list(argv))
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            code = app.run(args)
+    return code, commands, out.getvalue()
+
+def test_batch_mode():
+    """Test batch file parsing, entry validation and the failure count."""
+    entries = [
+        {'operation': 'later', 'output': 'saved.md'},
+        {'operation': 'dm', 'channel': 'D123', 'output': 'dm.md', 'since': '2024-01-01'},
+        {'operation': 'dm', 'output': 'missing_channel.md'},   # fails: no channel
+        {'operation': 'nope'},                                  # fails: unknown operation
+        {'operation': 'later', 'colour': 'blue'},               # fails: unknown key
+        'not an object',                                        # fails: not a dict
+    ]
+    code, commands, out = run_batch(entries, '-t', 'xoxp-test')
+    assert code == 1
+    assert commands == [
+        ['-t', 'xoxp-test', '-o', 'saved.md'],
+        ['-t', 'xoxp-test', '-c', 'D123', '-o', 'dm.md', '-s', '2024-01-01'],
+    ], commands
+    assert "2/6 operations succeeded" in out, out
+    
+    # All entries succeed
+    code, commands, out = run_batch(entries[:2], '-t', 'xoxp-test')
+    assert code == 0 and len(commands) == 2 and "2/2 operations succeeded" in out
+    
+    # A batch-wide --output, or entries sharing an output, would overwrite exports: nothing runs
+    code, commands, out = run_batch(entries[:2], '-t', 'xoxp-test', '-o', 'all.md')
+    assert code == 1 and commands == [] and "--output cannot be used with --batch" in out
+    code, commands, out = run_batch([entries[0], {'operation': 'later', 'output': 'saved.md'}], '-t', 'xoxp-test')
+    assert code == 1 and commands == [] and "saved.md" in out
+    
+    # Unreadable or malformed batch files
+    code, commands, out = run_batch({'operation': 'later'}, '-t', 'xoxp-test')
+    assert code == 1 and commands == [] and "JSON list" in out
+    
+    print("✅ Batch mode test complete")
+
 if __name__ == "__main__":
     print("🧪 Testing Standardized Slack Export Utilities\n")
     
     test_logging()
     test_rate_limiter()
+    test_fast_parse_args()
+    test_batch_mode()
+    test_jsonl_path()
+    test_atomic_write()
+    test_name_store()
     
     print("\n✅ All tests completed!")
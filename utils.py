@@ -6,15 +6,159 @@ Standardized logging, progress tracking, and rate limiting utilities
 for all Slack export tools.
 """
 
+import atexit
+import contextlib
+import functools
+import hashlib
+import itertools
+import json
 import time
 import sys
 import os
+import threading
 import requests
-from typing import Optional, Dict, Any, List
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Set, Tuple
 from datetime import datetime
 
+try:
+    import orjson  # Optional: much faster JSON parsing and encoding for large exports
+except ImportError:
+    orjson = None
+
+# Upper bound on in-flight page requests when paginating concurrently.
+# search.messages is a Tier 2 method, so keep this small.
+MAX_CONCURRENT_REQUESTS = 4
+
+# A users.list / conversations.list page (Tier 2, read one after another) is
+# charged as this many users.info / conversations.info lookups (Tier 4, run
+# concurrently). A prewarm walks at most one directory page per this many
+# missing IDs, so on a big workspace it stops long before the end of the
+# directory and leaves the rest to plain lookups.
+LOOKUPS_PER_DIRECTORY_PAGE = 10
+
+# DM histories longer than one page are split into this many time windows
+# below the first page, fetched MAX_CONCURRENT_REQUESTS at a time; more windows
+# than workers keeps them busy when messages cluster in part of the range.
+HISTORY_WINDOWS = 8
+
+# users.info / conversations.info are Tier 4, so leftover IDs can be resolved
+# with more requests in flight than paginated search calls.
+MAX_CONCURRENT_LOOKUPS = 16
+
+# Per-exporter cap on remembered user/channel names; the oldest entries are
+# evicted first so long exports over huge workspaces keep a bounded footprint.
+NAME_CACHE_SIZE = 4096
+
+# Resolved names are kept on disk between runs, one file per token (set
+# SLACK_CLI_NO_DISK_CACHE=1 to turn this off). Channels are renamed far more
+# often than people change their display names, so they expire sooner.
+NAME_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'slack-cli-utils')
+USER_NAME_TTL = 24 * 60 * 60
+CHANNEL_NAME_TTL = 60 * 60
+
+# Per-message loops only redraw the progress bar every this many items (and on
+# the last one); formatting and flushing a line per message is measurable on
+# large exports.
+PROGRESS_INTERVAL = 256
+
+# Output files are written through a 1 MiB buffer so per-message writes, and
+# the many small chunks json.dump emits, coalesce into large syscalls.
+WRITE_BUFFER_SIZE = 1 << 20
+
+# (connect, read) timeouts for Web API calls: an unreachable host fails fast
+# instead of waiting out the full read timeout.
+API_TIMEOUT = (5, 30)
+
+
+class FIFOCache(OrderedDict):
+    """Dict that evicts its oldest entry once it holds more than `capacity` items."""
+    
+    def __init__(self, capacity: int = NAME_CACHE_SIZE):
+        super().__init__()
+        self.capacity = capacity
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if len(self) > self.capacity:
+            self.popitem(last=False)
+
+
+class NameStore:
+    """User and channel name caches shared by the exporters using one token, saved to disk at exit."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.users = FIFOCache()
+        self.channels = FIFOCache()
+        self._saved_at = {}  # (kind, id) -> when the name was first cached
+        self._load()
+    
+    def _caches(self) -> Tuple[Tuple[str, FIFOCache, int], ...]:
+        return (('users', self.users, USER_NAME_TTL), ('channels', self.channels, CHANNEL_NAME_TTL))
+    
+    def _load(self):
+        """Seed the caches with the names saved by earlier runs that have not expired."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            now = time.time()
+            for kind, cache, ttl in self._caches():
+                for item_id, (name, saved_at) in data.get(kind, {}).items():
+                    if now - saved_at < ttl:
+                        cache[item_id] = name
+                        self._saved_at[kind, item_id] = saved_at
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass  # Missing or unreadable cache: start cold
+    
+    def save(self):
+        """Write the caches back to disk; a failure only costs the next run some lookups."""
+        now = time.time()
+        # Rebuilt from the live caches so IDs the FIFOCaches evicted are forgotten too
+        self._saved_at = {
+            (kind, item_id): self._saved_at.get((kind, item_id), now)
+            for kind, cache, _ in self._caches() for item_id in cache
+        }
+        # Lookups that failed cache the bare ID; those are not worth keeping
+        data = {
+            kind: {item_id: [name, self._saved_at[kind, item_id]]
+                   for item_id, name in cache.items() if name != item_id}
+            for kind, cache, _ in self._caches()
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+            with atomic_write(self.path, 'w', encoding='utf-8', errors='replace') as f:
+                json.dump(data, f, ensure_ascii=False)
+        except OSError:
+            pass
+
+
+_NAME_STORES = {}
+
+
+def name_store_for(token: str) -> Optional[NameStore]:
+    """Return the shared name store for a token, or None if the disk cache is turned off."""
+    if os.environ.get('SLACK_CLI_NO_DISK_CACHE') == '1':
+        return None
+    
+    # Names belong to the token's workspace; the file is named by a hash, never the token
+    key = hashlib.sha256(token.encode('utf-8')).hexdigest()[:16]
+    store = _NAME_STORES.get(key)
+    if store is None:
+        store = _NAME_STORES[key] = NameStore(os.path.join(NAME_CACHE_DIR, f'{key}.json'))
+        atexit.register(store.save)
+    return store
+
+
 class SlackLogger:
-    """Standardized logging for Slack export tools."""
+    """
+    Standardized logging for Slack export tools.
+
+    Log output goes to stderr so stdout carries only each tool's final result
+    line and stays usable when the tools are scripted.
+    """
     
     def __init__(self, tool_name: str):
         self.tool_name = tool_name
@@ -22,27 +166,27 @@ class SlackLogger:
     
     def phase(self, phase_num: int, description: str):
         """Log a major phase of operation."""
-        print(f"\n📋 Phase {phase_num}: {description}")
+        print(f"\n📋 Phase {phase_num}: {description}", file=sys.stderr)
     
     def info(self, message: str, indent: int = 0):
         """Log general information."""
         prefix = "  " * indent
-        print(f"{prefix}ℹ️  {message}")
+        print(f"{prefix}ℹ️  {message}", file=sys.stderr)
     
     def success(self, message: str, indent: int = 0):
         """Log success message."""
         prefix = "  " * indent
-        print(f"{prefix}✅ {message}")
+        print(f"{prefix}✅ {message}", file=sys.stderr)
     
     def warning(self, message: str, indent: int = 0):
         """Log warning message."""
         prefix = "  " * indent
-        print(f"{prefix}⚠️  Warning: {message}")
+        print(f"{prefix}⚠️  Warning: {message}", file=sys.stderr)
     
     def error(self, message: str, indent: int = 0):
         """Log error message."""
         prefix = "  " * indent
-        print(f"{prefix}❌ Error: {message}")
+        print(f"{prefix}❌ Error: {message}", file=sys.stderr)
     
     def progress(self, current: int, total: int, description: str = "", end: str = "\r"):
         """Log progress with consistent formatting."""
@@ -62,21 +206,25 @@ class SlackLogger:
         if description:
             progress_msg += f" - {description}"
         
-        print(progress_msg, end=end, flush=True)
+        print(progress_msg, end=end, file=sys.stderr, flush=True)
         
         if current == total:
-            print()  # New line when complete
+            print(file=sys.stderr)  # New line when complete
     
     def api_call(self, endpoint: str, page: int = None, result_count: int = None):
         """Log API call with consistent formatting."""
         page_info = f" page {page}" if page else ""
         result_info = f" ({result_count} items)" if result_count is not None else ""
-        print(f"  🔄 API: {endpoint}{page_info}{result_info}", flush=True)
+        print(f"  🔄 API: {endpoint}{page_info}{result_info}", file=sys.stderr)
     
     def completion_summary(self, total_items: int, total_time: float):
         """Log completion summary."""
         rate = total_items / total_time if total_time > 0 else 0
-        print(f"\n🎉 Complete! Processed {total_items:,} items in {total_time:.1f}s ({rate:.1f} items/sec)")
+        print(f"\n🎉 Complete! Processed {total_items:,} items in {total_time:.1f}s ({rate:.1f} items/sec)", file=sys.stderr)
+
+
+class RateLimitedError(Exception):
+    """A name lookup that Slack was still rate limiting after every retry."""
 
 
 class SlackRateLimiter:
@@ -84,31 +232,46 @@ class SlackRateLimiter:
     
     def __init__(self, logger: SlackLogger):
         self.logger = logger
-        self.last_request_time = 0
         self.min_interval = 0.1  # Minimum 100ms between requests
+        self.interval = self.min_interval  # Current spacing, widened when Slack reports its budget
+        self.next_request_time = 0.0  # time.monotonic() before which no request may start
+        self._lock = threading.Lock()  # Pages may be fetched from worker threads
     
     def handle_rate_limit(self, response) -> bool:
         """
         Handle rate limiting from Slack API response.
         Returns True if request should be retried, False otherwise.
+
+        Waits are applied to the next request of every thread sharing this
+        limiter (see throttle_request), not just the one that saw the response.
         """
         if response.status_code == 429:
             # Explicit rate limit
             retry_after = self._get_retry_after(response)
             self.logger.warning(f"Rate limited - waiting {retry_after:.1f}s", indent=1)
-            time.sleep(retry_after)
+            self._pause(retry_after)
             return True
         
         # Check rate limit headers proactively
         remaining = response.headers.get('X-Rate-Limit-Remaining')
-        if remaining and int(remaining) <= 1:
+        if remaining:
+            remaining = int(remaining)
             reset_time = self._get_reset_time(response)
-            if reset_time > 0:
+            if remaining <= 1:
                 self.logger.info(f"Approaching rate limit - waiting {reset_time:.1f}s", indent=1)
-                time.sleep(reset_time)
+                self._pause(reset_time)
+            else:
+                # Spread the rest of the window's budget evenly instead of bursting into a stall
+                with self._lock:
+                    self.interval = max(self.min_interval, reset_time / remaining)
         
         return False
     
+    def _pause(self, seconds: float):
+        """Hold back the next request of every thread using this limiter."""
+        with self._lock:
+            self.next_request_time = max(self.next_request_time, time.monotonic() + seconds)
+    
     def _get_retry_after(self, response) -> float:
         """Get retry-after time with safety buffer."""
         retry_after = response.headers.get('Retry-After')
@@ -137,13 +300,16 @@ class SlackRateLimiter:
         return 1.0  # Default 1 second wait
     
     def throttle_request(self):
-        """Ensure minimum interval between requests."""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_interval:
-            sleep_time = self.min_interval - elapsed
-            time.sleep(sleep_time)
+        """Wait for this request's slot: the current interval after the last one, or the end of a pause."""
+        # Reserve the slot under the lock but sleep outside it, so a pause from
+        # another thread's 429 is not held up behind a sleeping request
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self.next_request_time)
+            self.next_request_time = slot + self.interval
         
-        self.last_request_time = time.time()
+        if slot > now:
+            time.sleep(slot - now)
     
     def exponential_backoff(self, attempt: int, max_wait: float = 300.0) -> float:
         """Calculate exponential backoff delay."""
@@ -165,41 +331,68 @@ class SlackExporter:
     def __init__(self, token: str, tool_name: str):
         self.token = token
         self.logger = SlackLogger(tool_name)
-        self.rate_limiter = SlackRateLimiter(self.logger)
+        self.rate_limiter = SlackRateLimiter(self.logger)  # File downloads; API calls use rate_limiter_for
+        self.method_limiters = {}
+        self._method_limiters_lock = threading.Lock()
         self.session = None
+        name_store = name_store_for(token)
+        self.user_cache = name_store.users if name_store else FIFOCache()
+        self.channel_cache = name_store.channels if name_store else FIFOCache()
+        # Per-instance memoized lookups: repeat IDs, the common case, hit a C-level cache.
+        # A rate-limited lookup raises instead of returning, so it is never memoized.
+        self._memo_user_name = functools.lru_cache(maxsize=NAME_CACHE_SIZE)(self._resolve_user_name)
+        self._memo_channel_name = functools.lru_cache(maxsize=NAME_CACHE_SIZE)(self._resolve_channel_name)
         self._setup_session()
     
     def _setup_session(self):
-        """Setup requests session with consistent headers."""
+        """Setup requests session with consistent headers and a pooled keep-alive adapter."""
         self.session = requests.Session()
+        # The default pool keeps 10 connections per host, fewer than the concurrent
+        # name lookups in flight, so extra sockets would be opened and thrown away
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONCURRENT_LOOKUPS)
+        self.session.mount('https://', adapter)
         self.session.headers.update({
             'Authorization': f'Bearer {self.token}',
             'Content-Type': 'application/json',
             'User-Agent': f'SlackExporter/{self.logger.tool_name}'
         })
     
+    def rate_limiter_for(self, method: str) -> SlackRateLimiter:
+        """
+        Rate limiter for one Web API method, e.g. 'search.messages'.
+
+        Slack budgets requests per method, so a 429 on search pages should not
+        hold back users.info lookups running alongside them.
+        """
+        limiter = self.method_limiters.get(method)
+        if limiter is None:
+            with self._method_limiters_lock:
+                limiter = self.method_limiters.setdefault(method, SlackRateLimiter(self.logger))
+        return limiter
+    
     def make_api_request(self, url: str, params: Dict[str, Any] = None, max_retries: int = 5) -> Optional[Dict[str, Any]]:
         """
         Make standardized API request with consistent error handling and backoff.
         """
         if params is None:
             params = {}
+        rate_limiter = self.rate_limiter_for(url.rsplit('/', 1)[-1])
         
         for attempt in range(max_retries):
             try:
                 # Throttle requests
-                self.rate_limiter.throttle_request()
+                rate_limiter.throttle_request()
                 
                 # Make request
-                response = self.session.get(url, params=params, timeout=30)
+                response = self.session.get(url, params=params, timeout=API_TIMEOUT)
                 
                 # Handle rate limiting
-                if self.rate_limiter.handle_rate_limit(response):
+                if rate_limiter.handle_rate_limit(response):
                     continue  # Retry after rate limit handling
                 
                 # Check response
                 response.raise_for_status()
-                data = response.json()
+                data = parse_json_response(response)
                 
                 if not data.get('ok'):
                     error = data.get('error', 'Unknown error')
@@ -221,14 +414,14 @@ class SlackExporter:
                 
             except requests.exceptions.RequestException as e:
                 if attempt < max_retries - 1:
-                    self.rate_limiter.exponential_backoff(attempt)
+                    rate_limiter.exponential_backoff(attempt)
                     continue
                 else:
                     self.logger.error(f"Network error after {max_retries} attempts: {e}")
                     return None
             except Exception as e:
                 if attempt < max_retries - 1:
-                    self.rate_limiter.exponential_backoff(attempt)
+                    rate_limiter.exponential_backoff(attempt)
                     continue
                 else:
                     self.logger.error(f"API request failed after {max_retries} attempts: {e}")
@@ -236,6 +429,180 @@ class SlackExporter:
         
         return None
     
+    def user_name(self, user_id: str) -> str:
+        """Display name for a user ID, or the ID itself if it cannot be resolved right now."""
+        try:
+            return self._memo_user_name(user_id)
+        except RateLimitedError:
+            return user_id
+    
+    def channel_name(self, channel_id: str) -> str:
+        """Display name for a channel ID, or the ID itself if it cannot be resolved right now."""
+        try:
+            return self._memo_channel_name(channel_id)
+        except RateLimitedError:
+            return channel_id
+    
+    def _resolve_user_name(self, user_id: str) -> str:
+        """Resolve a user ID to a display name (see user_name for the memoized version)."""
+        return self._cached_lookup('users.info', get_user_name, self.user_cache, user_id) if user_id else 'Unknown User'
+    
+    def _resolve_channel_name(self, channel_id: str) -> str:
+        """Resolve a channel ID to a display name (see channel_name for the memoized version)."""
+        return self._cached_lookup('conversations.info', get_channel_name, self.channel_cache, channel_id) if channel_id else 'Unknown Channel'
+    
+    def iter_cursor_pages(self, endpoint: str, params: Dict[str, Any], key: str,
+                          max_pages: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield items under `key` from a cursor-paginated Slack API method, reading at most max_pages pages."""
+        cursor = None
+        page = 1
+        
+        while max_pages is None or page <= max_pages:
+            page_params = dict(params)
+            if cursor:
+                page_params['cursor'] = cursor
+            
+            self.logger.api_call(endpoint, page=page)
+            data = self.make_api_request(f'https://slack.com/api/{endpoint}', page_params)
+            if not data:
+                return
+            
+            yield from data.get(key, [])
+            
+            cursor = data.get('response_metadata', {}).get('next_cursor')
+            if not cursor:
+                return
+            page += 1
+    
+    def iter_search_pages(self, query: str, page_size: int, max_pages: Optional[int] = None) -> Iterator[tuple]:
+        """
+        Yield (page, messages section) for a search.messages query, in page order.
+
+        The first page reports the total page count, so the remaining pages are
+        requested concurrently instead of one round-trip at a time. Iteration
+        stops at the first page that fails or has no matches.
+        """
+        first = self._fetch_search_page(query, 1, page_size)
+        if not first or not first.get('matches'):
+            self.logger.info("No more messages found", indent=1)
+            return
+        yield 1, first
+        
+        total_pages = first.get('paging', {}).get('pages', 1)
+        if max_pages:
+            total_pages = min(total_pages, max_pages)
+        if total_pages <= 1:
+            return
+        
+        pages = iter(range(2, total_pages + 1))
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+            # Keep only MAX_CONCURRENT_REQUESTS pages in flight, so stopping early
+            # leaves no queue of Tier 2 requests behind to wait for
+            pending = deque()
+            for page in itertools.islice(pages, MAX_CONCURRENT_REQUESTS):
+                pending.append((page, executor.submit(self._fetch_search_page, query, page, page_size)))
+            
+            try:
+                # Results are taken in page order, so stop at the first gap
+                while pending:
+                    page, future = pending.popleft()
+                    messages_data = future.result()
+                    if not messages_data or not messages_data.get('matches'):
+                        self.logger.info("No more messages found", indent=1)
+                        return
+                    
+                    next_page = next(pages, None)
+                    if next_page is not None:
+                        pending.append((next_page, executor.submit(self._fetch_search_page, query, next_page, page_size)))
+                    yield page, messages_data
+            finally:
+                for _, future in pending:
+                    future.cancel()
+    
+    def _fetch_search_page(self, query: str, page: int, page_size: int) -> Optional[Dict[str, Any]]:
+        """Fetch a single page of search results, returning the 'messages' section."""
+        params = {
+            'query': query,
+            'count': page_size,
+            'page': page
+        }
+        
+        self.logger.api_call("search.messages", page=page)
+        data = self.make_api_request('https://slack.com/api/search.messages', params)
+        if not data:
+            return None
+        
+        return data.get('messages', {})
+    
+    def prewarm_caches(self, user_ids: Iterable[str] = (), channel_ids: Iterable[str] = ()):
+        """
+        Resolve user and channel names up front so per-message lookups become dict hits.
+
+        Large ID sets are first looked for in users.list / conversations.list (the
+        two walks run concurrently), reading a number of pages proportional to
+        the IDs missing and stopping once all are found. Whatever is still
+        missing afterwards, such as guests, private or shared channels, is
+        deduplicated and looked up concurrently.
+        """
+        missing_users = set(user_ids) - self.user_cache.keys()
+        missing_channels = set(channel_ids) - self.channel_cache.keys()
+        
+        loaders = []
+        if len(missing_users) >= LOOKUPS_PER_DIRECTORY_PAGE:
+            loaders.append((self._load_user_directory, missing_users))
+        if len(missing_channels) >= LOOKUPS_PER_DIRECTORY_PAGE:
+            loaders.append((self._load_channel_directory, missing_channels))
+        
+        if loaders:
+            self.logger.info(f"Prewarming name caches for {len(missing_users)} users, {len(missing_channels)} channels", indent=1)
+            with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+                futures = [executor.submit(loader, set(wanted), len(wanted) // LOOKUPS_PER_DIRECTORY_PAGE)
+                           for loader, wanted in loaders]
+                for future in futures:
+                    future.result()
+            
+            missing_users -= self.user_cache.keys()
+            missing_channels -= self.channel_cache.keys()
+        
+        lookups = [('users.info', get_user_name, self.user_cache, user_id) for user_id in missing_users]
+        lookups += [('conversations.info', get_channel_name, self.channel_cache, channel_id) for channel_id in missing_channels]
+        if not lookups:
+            return
+        
+        self.logger.info(f"Resolving {len(missing_users)} user and {len(missing_channels)} channel names", indent=1)
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_LOOKUPS, len(lookups))) as executor:
+            list(executor.map(lambda lookup: self._prewarm_lookup(*lookup), lookups))
+    
+    def _prewarm_lookup(self, method: str, lookup, cache: Dict[str, str], item_id: str):
+        """Prewarm one name; a rate-limited one is left for the per-message lookup to retry."""
+        with contextlib.suppress(RateLimitedError):
+            self._cached_lookup(method, lookup, cache, item_id)
+    
+    def _cached_lookup(self, method: str, lookup, cache: Dict[str, str], item_id: str) -> str:
+        """Run a cached name lookup helper under its API method's rate limiter."""
+        return lookup(cache, item_id, self.session, self.rate_limiter_for(method))
+    
+    def _load_user_directory(self, wanted: set, max_pages: int):
+        """Populate user_cache from users.list with the wanted IDs, stopping once all are found."""
+        for user in self.iter_cursor_pages('users.list', {'limit': 200}, 'members', max_pages):
+            if user.get('id') in wanted:
+                self.user_cache[user['id']] = user_display_name(user)
+                wanted.discard(user['id'])
+                if not wanted:
+                    return
+    
+    def _load_channel_directory(self, wanted: set, max_pages: int):
+        """Populate channel_cache from conversations.list with the wanted IDs, stopping once all are found."""
+        # Public channels only: listing private ones needs groups:read, which the
+        # search exports do not require; private IDs fall through to conversations.info
+        params = {'types': 'public_channel', 'limit': 200}
+        for channel in self.iter_cursor_pages('conversations.list', params, 'channels', max_pages):
+            if channel.get('id') in wanted:
+                self.channel_cache[channel['id']] = channel_display_name(channel)
+                wanted.discard(channel['id'])
+                if not wanted:
+                    return
+    
     def export_summary(self, output_file: str, total_items: int, export_time: float):
         """Log standardized export summary."""
         self.logger.success(f"Export complete!")
@@ -320,64 +687,248 @@ class SlackExporter:
         return stats
 
 
+def message_channel_id(message: Dict[str, Any]) -> str:
+    """Get a message's channel ID (search results nest it in a channel object)."""
+    channel = message.get('channel', '')
+    return channel.get('id', '') if isinstance(channel, dict) else channel
+
+
+def extend_unique(target: List[Dict[str, Any]], messages: Iterable[Dict[str, Any]], seen: set) -> int:
+    """
+    Append messages whose (channel, ts) key is not already in `seen`.
+
+    Returns the number of messages added.
+    """
+    added = 0
+    for message in messages:
+        key = (message_channel_id(message), message.get('ts', ''))
+        if key not in seen:
+            seen.add(key)
+            target.append(message)
+            added += 1
+    return added
+
+
+@contextlib.contextmanager
+def atomic_write(output_file: str, mode: str = 'w', **kwargs) -> Iterator[Any]:
+    """
+    Write to a temporary sibling of output_file and move it into place on success.
+
+    An interrupted or failed export leaves any previous file untouched instead
+    of a truncated one.
+    """
+    tmp_path = f"{output_file}.tmp"
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json(data: Any, output_file: str):
+    """Write data as indented UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            payload = None  # e.g. an unpaired surrogate in message text; json writes it as '?'
+        if payload is not None:
+            with atomic_write(output_file, 'wb') as f:
+                f.write(payload)
+            return
+    
+    with atomic_write(output_file, 'w', encoding='utf-8', errors='replace', buffering=WRITE_BUFFER_SIZE) as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def json_line(data: Any) -> str:
+    """Serialize one JSON Lines record, trailing newline included; orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except orjson.JSONEncodeError:
+            pass  # e.g. an unpaired surrogate in message text
+    return json.dumps(data, ensure_ascii=False) + '\n'
+
+
+def parse_json_response(response) -> Any:
+    """Decode a response body, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            pass  # e.g. an unpaired surrogate escape, which json accepts and orjson rejects
+    return response.json()
+
+
+def ts_sort_key(message: Dict[str, Any]) -> float:
+    """Numeric sort key for a message's Slack ts; missing or empty ts sorts as 0."""
+    return float(message.get('ts') or 0.0)
+
+
+@functools.lru_cache(maxsize=8192)
+def _format_second(second: int) -> str:
+    """Format a whole Unix second (memoized; bursts of messages share the same second)."""
+    # time.localtime skips building a datetime object for every message
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+
+
 def format_timestamp(ts: str) -> str:
     """Convert Slack timestamp to readable format."""
     try:
-        timestamp = float(ts)
-        dt = datetime.fromtimestamp(timestamp)
-        return dt.strftime('%Y-%m-%d %H:%M:%S')
-    except (ValueError, TypeError):
+        # Every ts is unique, so cache on the second it falls in rather than the string
+        return _format_second(int(float(ts)))
+    except (ValueError, TypeError, OverflowError, OSError):
         return ts
 
 
-def get_user_name(user_cache: Dict[str, str], user_id: str, session: requests.Session) -> str:
-    """Get user name with caching."""
+def format_attachments_markdown(attachments: List[Dict[str, Any]]) -> str:
+    """Render a message's attachment list as Markdown, or '' if there are none."""
+    if not attachments:
+        return ''
+    lines = [f"- {att.get('title', att.get('fallback', 'Attachment'))}\n" for att in attachments]
+    return f"**Attachments:** {len(attachments)} attachment(s)\n{''.join(lines)}\n"
+
+
+def format_files_markdown(files: List[Dict[str, Any]]) -> str:
+    """Render a message's file list as Markdown, or '' if there are none."""
+    if not files:
+        return ''
+    lines = []
+    for file_info in files:
+        name = file_info.get('name', 'Unknown file')
+        local_path = file_info.get('local_path')
+        url = file_info.get('url_private', file_info.get('permalink', ''))
+        if local_path:
+            lines.append(f"- {name}\n  - Downloaded: {local_path}\n  - Original URL: {url}\n")
+        else:
+            lines.append(f"- {name}: {url}\n")
+    return f"**Files:** {len(files)} file(s)\n{''.join(lines)}\n"
+
+
+def format_reactions_markdown(reactions: List[Dict[str, Any]]) -> str:
+    """Render a message's reactions as Markdown, or '' if there are none."""
+    if not reactions:
+        return ''
+    lines = ''.join(f"- :{reaction.get('name', '')}: ({reaction.get('count', 0)})\n" for reaction in reactions)
+    return f"**Reactions:**\n{lines}\n"
+
+
+def user_display_name(user: Dict[str, Any]) -> str:
+    """Pick the most readable name from a Slack user object."""
+    return user.get('real_name') or user.get('display_name') or user.get('name', user.get('id', ''))
+
+
+def channel_display_name(channel: Dict[str, Any]) -> str:
+    """Format a Slack conversation object's name, falling back to its ID."""
+    channel_id = channel.get('id', '')
+    name = channel.get('name', channel_id)
+    if name != channel_id:
+        name = f"#{name}"
+    return name
+
+
+def check_token(token: str, timeout: float = 5) -> Tuple[Optional[str], Optional[Set[str]]]:
+    """
+    Probe a token with auth.test before an export starts.
+
+    Returns (error, scopes): Slack's error code if it rejected the token, and the
+    granted OAuth scopes if it reported them. A network failure is not treated
+    as a rejection, so both are None and the export gets to try for itself.
+    """
+    try:
+        response = requests.get('https://slack.com/api/auth.test',
+                                headers={'Authorization': f'Bearer {token}'}, timeout=timeout)
+        data = parse_json_response(response)
+    except (requests.exceptions.RequestException, ValueError):
+        return None, None
+    
+    if not data.get('ok'):
+        return data.get('error', 'invalid_auth'), None
+    
+    header = response.headers.get('X-OAuth-Scopes')
+    scopes = {scope.strip() for scope in header.split(',')} if header else None
+    return None, scopes
+
+
+def fetch_lookup(session: requests.Session, method: str, params: Dict[str, Any],
+                 rate_limiter: Optional[SlackRateLimiter] = None, max_retries: int = 5) -> Optional[Dict[str, Any]]:
+    """
+    Call a users.info / conversations.info style method for a name lookup.
+
+    Returns the decoded response, or None if the request failed. Rate limits are
+    waited out through rate_limiter; if Slack is still rate limiting after
+    max_retries (or there is no limiter), RateLimitedError is raised so the
+    caller does not cache the ID as if the lookup had failed for good.
+    """
+    for attempt in range(max_retries):
+        if rate_limiter is not None:
+            rate_limiter.throttle_request()
+        try:
+            response = session.get(f'https://slack.com/api/{method}', params=params, timeout=API_TIMEOUT)
+            if rate_limiter is not None and rate_limiter.handle_rate_limit(response):
+                continue
+            if response.status_code == 429:
+                raise RateLimitedError(method)
+            if response.status_code != 200:
+                return None
+            data = parse_json_response(response)
+        except (requests.exceptions.RequestException, ValueError):
+            return None
+        
+        if not isinstance(data, dict):
+            return None  # A JSON list or scalar is not a Slack API reply
+        if data.get('error') != 'ratelimited':
+            return data
+        if rate_limiter is None:
+            raise RateLimitedError(method)
+        rate_limiter.exponential_backoff(attempt)
+    
+    raise RateLimitedError(method)
+
+
+def get_user_name(user_cache: Dict[str, str], user_id: str, session: requests.Session,
+                  rate_limiter: Optional[SlackRateLimiter] = None) -> str:
+    """Get user name with caching; raises RateLimitedError rather than caching a rate-limited miss."""
     if user_id in user_cache:
         return user_cache[user_id]
     
-    try:
-        response = session.get(f'https://slack.com/api/users.info', params={'user': user_id})
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('ok') and 'user' in data:
-                name = data['user'].get('real_name') or data['user'].get('display_name') or data['user'].get('name', user_id)
-                user_cache[user_id] = name
-                return name
-    except Exception:
-        pass
+    data = fetch_lookup(session, 'users.info', {'user': user_id}, rate_limiter)
+    if data and data.get('ok') and 'user' in data:
+        name = user_display_name(data['user']) or user_id
+        user_cache[user_id] = name
+        return name
     
     user_cache[user_id] = user_id
     return user_id
 
 
-def get_channel_name(channel_cache: Dict[str, str], channel_id: str, session: requests.Session) -> str:
-    """Get channel name with caching."""
+def get_channel_name(channel_cache: Dict[str, str], channel_id: str, session: requests.Session,
+                     rate_limiter: Optional[SlackRateLimiter] = None) -> str:
+    """Get channel name with caching; raises RateLimitedError rather than caching a rate-limited miss."""
     if channel_id in channel_cache:
         return channel_cache[channel_id]
 
-    try:
-        # Try conversations.info first
-        response = session.get(f'https://slack.com/api/conversations.info', params={'channel': channel_id})
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('ok') and 'channel' in data:
-                name = data['channel'].get('name', channel_id)
-                if name != channel_id:
-                    name = f"#{name}"
-                channel_cache[channel_id] = name
-                return name
-    except Exception:
-        pass
+    data = fetch_lookup(session, 'conversations.info', {'channel': channel_id}, rate_limiter)
+    if data and data.get('ok') and 'channel' in data:
+        name = channel_display_name(data['channel'])
+        channel_cache[channel_id] = name
+        return name
 
     channel_cache[channel_id] = channel_id
     return channel_id
 
 
+# Characters that are invalid in filenames on some platform, all mapped to '_'
+_FILENAME_TRANSLATION = str.maketrans(dict.fromkeys('<>:"|?*\\/\n\r', '_'))
+
+
 def sanitize_filename(filename: str) -> str:
     """Remove invalid filesystem characters and truncate if needed."""
-    invalid_chars = '<>:"|?*\\/\n\r'
-    for char in invalid_chars:
-        filename = filename.replace(char, '_')
+    filename = filename.translate(_FILENAME_TRANSLATION)
     # Truncate to 200 chars (reserve space for prefix)
     if len(filename) > 200:
         base, ext = os.path.splitext(filename)